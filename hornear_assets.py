@@ -0,0 +1,87 @@
+"""
+Hornea las imágenes del juego en un único atlas pre-escalado y un manifiesto.
+
+Las imágenes de images/ son fuentes de 1024px o más que el juego escala a
+20-80px (o a la pantalla completa) al cargar. Este script aplica esos
+escalados una sola vez, empaqueta el resultado en atlas/atlas.png y escribe
+atlas/atlas.json con la posición de cada imagen. Las entradas sin tamaño se
+guardan a su tamaño nativo. GestorImagenes usa el atlas automáticamente
+cuando existe y copia cada imagen fuera de él al cargarlo.
+
+Uso: python hornear_assets.py
+Hay que volver a ejecutarlo si cambian las imágenes o ASSETS_JUEGO.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import json
+import pygame
+
+from main import ASSETS_JUEGO, RUTA_ATLAS, RUTA_MANIFIESTO_ATLAS, init_runtime
+
+ANCHO_MAXIMO_ATLAS = 2048
+
+
+def preparar_imagen(ruta, tamaño, alpha):
+    """
+    Carga la imagen original y le aplica el mismo escalado que usa el juego.
+    Con tamaño None se guarda tal cual: esa clave significa "tamaño nativo".
+    """
+    imagen = pygame.image.load(ruta).convert_alpha()
+    if tamaño is not None and imagen.get_size() != tamaño:
+        return pygame.transform.scale(imagen, tamaño)
+    return imagen
+
+
+def empaquetar(imagenes):
+    """
+    Coloca las imágenes por filas (de mayor a menor alto).
+    Devuelve el tamaño del atlas y el rect asignado a cada índice.
+    """
+    orden = sorted(range(len(imagenes)), key=lambda i: imagenes[i].get_height(), reverse=True)
+    ancho_atlas = max(ANCHO_MAXIMO_ATLAS, max(imagen.get_width() for imagen in imagenes))
+    rects = {}
+    x = y = alto_fila = 0
+    for i in orden:
+        ancho, alto = imagenes[i].get_size()
+        if x + ancho > ancho_atlas:
+            x = 0
+            y += alto_fila
+            alto_fila = 0
+        rects[i] = (x, y, ancho, alto)
+        x += ancho
+        alto_fila = max(alto_fila, alto)
+    ancho_usado = max(r[0] + r[2] for r in rects.values())
+    return (ancho_usado, y + alto_fila), rects
+
+
+def hornear():
+    init_runtime()  # convert_alpha necesita una ventana (la del driver dummy)
+    entradas = []
+    imagenes = []
+    for ruta, tamaño, alpha in ASSETS_JUEGO:
+        try:
+            imagenes.append(preparar_imagen(ruta, tamaño, alpha))
+        except Exception as e:
+            print(f"⚠️ Se omite {ruta}: {e}")
+            continue
+        entradas.append({"ruta": ruta, "tamaño": list(tamaño) if tamaño else None, "alpha": alpha})
+
+    tamaño_atlas, rects = empaquetar(imagenes)
+    atlas = pygame.Surface(tamaño_atlas, pygame.SRCALPHA)
+    for i, imagen in enumerate(imagenes):
+        atlas.blit(imagen, rects[i][:2])
+        entradas[i]["rect"] = list(rects[i])
+
+    os.makedirs(os.path.dirname(RUTA_ATLAS), exist_ok=True)
+    pygame.image.save(atlas, RUTA_ATLAS)
+    with open(RUTA_MANIFIESTO_ATLAS, "w", encoding="utf-8") as archivo:
+        json.dump({"version": 1, "atlas": os.path.basename(RUTA_ATLAS), "entradas": entradas},
+                  archivo, ensure_ascii=False, indent=2)
+
+    print(f"Atlas {tamaño_atlas[0]}x{tamaño_atlas[1]} con {len(entradas)} imágenes "
+          f"({os.path.getsize(RUTA_ATLAS) // 1024} KB) -> {RUTA_ATLAS}")
+
+
+if __name__ == "__main__":
+    hornear()
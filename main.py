@@ -1,17 +1,25 @@
 import pygame
 import random
 import os
+import sys
 import math
-import cProfile
-import pygame.gfxdraw
 from pygame import Surface, SRCALPHA
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Callable
 import numpy as np
 import asyncio
+import json
+import io
+import pickle
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import csv
 
 # ============= INICIALIZACIÓN Y CONFIGURACIÓN =============
-pygame.init()
-pygame.font.init()
+# Importar este módulo no abre ventana ni carga nada: pygame, la pantalla,
+# las fuentes y los sonidos se crean en init_runtime()
 
 # Definición de colores básicos
 NEGRO = (0, 0, 0)
@@ -23,16 +31,9 @@ AMARILLO = (255, 255, 0)
 GRIS = (128, 128, 128)
 GRIS_OSCURO = (50, 50, 50)
 NARANJA = (255, 165, 0)
-# Configuración de fuentes
-try:
-    FUENTE_TITULO = pygame.font.Font("fonts/MedievalSharp-Regular.ttf", 74)
-    FUENTE_BOTONES = pygame.font.Font("fonts/MedievalSharp-Regular.ttf", 36)
-    FUENTE_NORMAL = pygame.font.Font("fonts/MedievalSharp-Regular.ttf", 30)
-except:
-    print("⚠️ No se pudieron cargar las fuentes personalizadas. Usando fuentes por defecto.")
-    FUENTE_TITULO = pygame.font.Font(None, 74)
-    FUENTE_BOTONES = pygame.font.Font(None, 36)
-    FUENTE_NORMAL = pygame.font.Font(None, 30)
+# Configuración de fuentes (se crean en init_runtime)
+RUTA_FUENTE = "fonts/MedievalSharp-Regular.ttf"
+FUENTE_TITULO = FUENTE_BOTONES = FUENTE_NORMAL = None
 
 # Colores mejorados
 DORADO = (218, 165, 32)
@@ -59,66 +60,359 @@ COSTO_ENERGIA_SPRINT = 2  # Duplicado de 1 a 2
 MAX_POSICIONES_SPRINT = 10
 TIEMPO_RECARGA_TOTAL = 5000  # 5 segundos para recargar completamente
 
+# Direcciones de los ataques en línea recta
+DIAGONAL = 0.7071  # Ajuste para movimiento diagonal (1/√2)
+ANGULOS_DIRECCION = {
+    "izquierda": 180,
+    "derecha": 0,
+    "arriba": 90,
+    "abajo": -90,
+    "arriba-derecha": 45,
+    "arriba-izquierda": 135,
+    "abajo-derecha": -45,
+    "abajo-izquierda": -135
+}
+VECTORES_DIRECCION = {
+    "izquierda": (-1, 0),
+    "derecha": (1, 0),
+    "arriba": (0, -1),
+    "abajo": (0, 1),
+    "arriba-derecha": (DIAGONAL, -DIAGONAL),
+    "arriba-izquierda": (-DIAGONAL, -DIAGONAL),
+    "abajo-derecha": (DIAGONAL, DIAGONAL),
+    "abajo-izquierda": (-DIAGONAL, DIAGONAL)
+}
+
 # Delays para items
 DELAY_ITEM_VIDA = 15000
 DELAY_ITEM_ENERGIA = 6000  # Reducido de 12000 a 6000 para mayor frecuencia
 DELAY_ITEM_SORPRESA = 25000
 
-# Configuración de pantalla
-pantalla = pygame.display.set_mode((ANCHO, ALTO), pygame.DOUBLEBUF)
-pygame.display.set_caption(TITULO)
+# Configuración de pantalla (la ventana se abre en init_runtime)
+pantalla = None
 reloj = pygame.time.Clock()
-fuente = pygame.font.Font(None, 30)
 
-# Cargar sonidos (con manejo de errores)
-try:
-    sonido_ataque = pygame.mixer.Sound("sounds/attack.wav")
-    sonido_golpe = pygame.mixer.Sound("sounds/hit.wav")
-except:
-    print("⚠️ Error al cargar sonidos. El juego continuará sin efectos de sonido.")
-    sonido_ataque = sonido_golpe = type('DummySound', (), {'play': lambda: None})()
+class RelojJuego:
+    """
+    Fuente de tiempo (en ms) de la lógica del juego.
+    Por defecto sigue a pygame.time.get_ticks(); en modo manual solo avanza
+    cuando la simulación lo pide, para poder jugar más rápido que el tiempo real.
+    """
+    def __init__(self, manual=False):
+        self.manual = manual
+        self.tiempo = 0
+
+    def ahora(self):
+        return self.tiempo if self.manual else pygame.time.get_ticks()
+
+    def avanzar(self, dt):
+        if self.manual:
+            self.tiempo += dt
+
+reloj_juego = RelojJuego()
+# Generador aleatorio de la lógica del juego (cada partida usa el suyo, con semilla)
+rng_juego = random.Random()
+
+# Paso fijo de la simulación: la lógica avanza siempre a FPS ticks por segundo
+DT_SIMULACION = 1000 / FPS
+MAX_TICKS_POR_FRAME = 5  # evita la espiral de la muerte si un frame tarda mucho
+
+def usar_reloj(nuevo_reloj):
+    """Cambia el reloj que usa la lógica del juego y devuelve el anterior"""
+    global reloj_juego
+    anterior = reloj_juego
+    reloj_juego = nuevo_reloj
+    return anterior
+
+def usar_rng(nuevo_rng):
+    """Cambia el generador aleatorio que usa la lógica del juego y devuelve el anterior"""
+    global rng_juego
+    anterior = rng_juego
+    rng_juego = nuevo_rng
+    return anterior
+
+class SonidoMudo:
+    """Sustituto de pygame.mixer.Sound cuando no hay sonidos (o aún no se han cargado)"""
+    def play(self, *args, **kwargs):
+        return None
+
+sonido_ataque = sonido_golpe = SonidoMudo()
+runtime_iniciado = False
+
+def init_runtime():
+    """
+    Inicializa pygame y crea la ventana, las fuentes y los sonidos.
+    Se puede llamar tantas veces como se quiera: solo la primera hace algo.
+    Devuelve la superficie de la pantalla.
+    """
+    global runtime_iniciado, pantalla, FUENTE_TITULO, FUENTE_BOTONES, FUENTE_NORMAL
+    global sonido_ataque, sonido_golpe
+    if runtime_iniciado:
+        return pantalla
+    runtime_iniciado = True
+    pygame.init()
+    # Si quien importa el módulo ya abrió una ventana, se reutiliza
+    pantalla = pygame.display.get_surface()
+    if pantalla is None:
+        pantalla = pygame.display.set_mode((ANCHO, ALTO), pygame.DOUBLEBUF)
+    pygame.display.set_caption(TITULO)
+    GestorImagenes.convertir_pendientes()
 
-# Cache de imágenes y superficies
-cache_imagenes: Dict[str, Surface] = {}
-cache_rotaciones: Dict[Tuple[int, float], Surface] = {}
+    try:
+        FUENTE_TITULO = pygame.font.Font(RUTA_FUENTE, 74)
+        FUENTE_BOTONES = pygame.font.Font(RUTA_FUENTE, 36)
+        FUENTE_NORMAL = pygame.font.Font(RUTA_FUENTE, 30)
+    except Exception:
+        print("⚠️ No se pudieron cargar las fuentes personalizadas. Usando fuentes por defecto.")
+        FUENTE_TITULO = pygame.font.Font(None, 74)
+        FUENTE_BOTONES = pygame.font.Font(None, 36)
+        FUENTE_NORMAL = pygame.font.Font(None, 30)
+
+    # Cargar sonidos (con manejo de errores)
+    try:
+        sonido_ataque = pygame.mixer.Sound("sounds/attack.wav")
+        sonido_golpe = pygame.mixer.Sound("sounds/hit.wav")
+    except Exception:
+        print("⚠️ Error al cargar sonidos. El juego continuará sin efectos de sonido.")
+        sonido_ataque = sonido_golpe = SonidoMudo()
+    return pantalla
 
-# Cargar y configurar el fondo
-try:
-    fondo = pygame.image.load("images/fondo.png").convert()
-except:
-    print("Error cargando fondo")
-    fondo = None
+# Cache de imágenes y superficies
+# Las imágenes se indexan por (ruta, tamaño, alpha) para que una misma ruta
+# pueda usarse a distintos tamaños sin pisarse en el cache
+cache_imagenes: Dict[Tuple[str, Optional[Tuple[int, int]], bool], Optional[Surface]] = {}
+cache_direcciones: Dict[Tuple[str, Tuple[int, int]], Dict[str, Surface]] = {}
+estadisticas_imagenes = {'aciertos': 0, 'fallos': 0}
+claves_sin_convertir = set()  # cargadas sin ventana: init_runtime las convierte al abrirla
+
+# Efectos prerenderizados (brillos, estela de sprint, sombras)
+cache_efectos: Dict[tuple, Surface] = {}
+PASO_ALPHA_EFECTOS = 8  # los niveles de transparencia se agrupan de 8 en 8
+
+# Textos ya rasterizados por (fuente, texto, color)
+cache_textos: Dict[tuple, Surface] = {}
+PASO_BRILLO_TEXTO = 5  # el brillo de los títulos avanza de 5 en 5 (0..50, 11 niveles)
+
+# Atlas horneado por hornear_assets.py (opcional: si no existe se leen los PNG originales)
+RUTA_ATLAS = "atlas/atlas.png"
+RUTA_MANIFIESTO_ATLAS = "atlas/atlas.json"
+atlas_cargado = False
+
+# Hilos para decodificar imágenes al arrancar (el navegador no tiene hilos)
+HAY_HILOS = sys.platform != "emscripten"
+HILOS_CARGA = min(4, os.cpu_count() or 1)
+
+# Imágenes que usa el juego, con el tamaño y modo alpha con el que se piden.
+# Se precargan una sola vez para que crear ataques, rocas o items no lea disco.
+# Un tamaño None significa que la imagen se usa sin escalar.
+ASSETS_JUEGO: List[Tuple[str, Optional[Tuple[int, int]], bool]] = [
+    ("images/fondo.png", None, False),
+    ("images/fondo_menu.png", (ANCHO, ALTO), False),
+    ("images/fondo_ganar.png", (ANCHO, ALTO), False),
+    ("images/fondo_perder.png", (ANCHO, ALTO), False),
+    ("images/fuego.png", (20, 20), True),
+    ("images/fuego_especial.png", (30, 30), True),
+    ("images/rayo.png", (TAMAÑO_ATAQUE, TAMAÑO_ATAQUE), True),
+    ("images/rayo_especial.png", (50, 50), True),
+    ("images/roca.png", (80, 80), True),
+    ("images/roca_grietas.png", (80, 80), True),
+    ("images/roca_destruida.png", (80, 80), True),
+    ("images/vida.png", (TAMAÑO_ITEM, TAMAÑO_ITEM), True),
+    ("images/energia.png", (TAMAÑO_ITEM, TAMAÑO_ITEM), True),
+    # Hojas de sprites de 4x3 frames (ver GestorAnimaciones.clips)
+    ("images/oso_sprites.png", None, True),
+    ("images/puma_sprites.png", None, True),
+    ("images/puma2_sprites.png", None, True),
+]
 
 # Función para dibujar sombra
 def dibujar_sombra(pantalla, x, y, ancho, alto, alpha=128):
-    sombra = pygame.Surface((ancho, alto//2), pygame.SRCALPHA)
-    pygame.draw.ellipse(sombra, (0, 0, 0, alpha), (0, 0, ancho, alto//2))
-    pantalla.blit(sombra, (x, y + alto - alto//4))
+    sombra = GestorEfectos.sombra(ancho, alto//2, alpha)
+    return pantalla.blit(sombra, (x, y + alto - alto//4))
 
 class GestorImagenes:
-    """Clase para gestionar la carga y cache de imágenes"""
+    """Registro de imágenes del juego: carga cada asset una vez y comparte la superficie"""
     @staticmethod
-    def cargar_imagen(ruta: str, tamaño: Tuple[int, int], color_fallback=None) -> Surface:
-        """Carga una imagen con manejo de errores y cache"""
-        if ruta not in cache_imagenes:
-            try:
-                imagen = pygame.image.load(ruta).convert_alpha()
-                cache_imagenes[ruta] = pygame.transform.scale(imagen, tamaño)
-            except Exception as e:
-                print(f"⚠️ Error al cargar {ruta}: {e}")
-                superficie = Surface(tamaño, SRCALPHA)
+    def _decodificar(ruta: str, tamaño: Optional[Tuple[int, int]]) -> Surface:
+        """
+        Lee y escala una imagen sin convertirla al formato de pantalla.
+        No toca la ventana, así que puede ejecutarse en un hilo de carga.
+        """
+        imagen = pygame.image.load(ruta)
+        if tamaño is not None and imagen.get_size() != tamaño:
+            imagen = pygame.transform.scale(imagen, tamaño)
+        return imagen
+
+    @staticmethod
+    def _convertir(imagen: Surface, alpha: bool) -> Surface:
+        """Convierte al formato de pantalla (solo desde el hilo principal y con ventana)"""
+        return imagen.convert_alpha() if alpha else imagen.convert()
+
+    @staticmethod
+    def _guardar(clave: Tuple[str, Optional[Tuple[int, int]], bool], imagen: Surface) -> Surface:
+        """
+        Guarda en el cache una imagen recién decodificada, convertida al formato
+        de pantalla. Sin ventana (simulaciones, herramientas) no se abre una:
+        la imagen se guarda tal cual e init_runtime() la convierte después.
+        """
+        if pygame.display.get_surface() is None:
+            # Una subsuperficie se copia para no retener a su padre (el atlas)
+            cache_imagenes[clave] = imagen.copy() if imagen.get_parent() is not None else imagen
+            claves_sin_convertir.add(clave)
+        else:
+            cache_imagenes[clave] = GestorImagenes._convertir(imagen, clave[2])
+        return cache_imagenes[clave]
+
+    @staticmethod
+    def convertir_pendientes():
+        """Convierte las imágenes del cache que se cargaron antes de abrir la ventana"""
+        for clave in claves_sin_convertir:
+            if cache_imagenes.get(clave) is not None:
+                cache_imagenes[clave] = GestorImagenes._convertir(cache_imagenes[clave], clave[2])
+        claves_sin_convertir.clear()
+
+    @staticmethod
+    def _leer_manifiesto_atlas() -> Optional[dict]:
+        """Manifiesto del atlas horneado, o None si no hay atlas o no se puede leer"""
+        if not (os.path.exists(RUTA_ATLAS) and os.path.exists(RUTA_MANIFIESTO_ATLAS)):
+            return None
+        try:
+            with open(RUTA_MANIFIESTO_ATLAS, encoding="utf-8") as archivo:
+                return json.load(archivo)
+        except Exception as e:
+            print(f"⚠️ Error al cargar el atlas, se usarán las imágenes originales: {e}")
+            return None
+
+    @staticmethod
+    def _registrar_atlas(manifiesto: dict, atlas: Surface):
+        """
+        Registra en el cache las imágenes del atlas ya decodificado. Cada una
+        se copia fuera del atlas, así el atlas entero no queda en memoria.
+        """
+        for entrada in manifiesto["entradas"]:
+            tamaño = tuple(entrada["tamaño"]) if entrada["tamaño"] is not None else None
+            clave = (entrada["ruta"], tamaño, entrada["alpha"])
+            # Las opacas van a formato de pantalla para un blit sin mezcla
+            GestorImagenes._guardar(clave, atlas.subsurface(pygame.Rect(entrada["rect"])))
+
+    @staticmethod
+    def _cargar_atlas():
+        """Registra en el cache las imágenes del atlas horneado, si existe"""
+        global atlas_cargado
+        if atlas_cargado:
+            return
+        atlas_cargado = True
+        manifiesto = GestorImagenes._leer_manifiesto_atlas()
+        if manifiesto is None:
+            return
+        try:
+            atlas = pygame.image.load(RUTA_ATLAS)
+        except Exception as e:
+            print(f"⚠️ Error al cargar el atlas, se usarán las imágenes originales: {e}")
+            return
+        GestorImagenes._registrar_atlas(manifiesto, atlas)
+
+    @staticmethod
+    def obtener(ruta: str, tamaño: Optional[Tuple[int, int]] = None, alpha: bool = True) -> Surface:
+        """Devuelve la imagen compartida para (ruta, tamaño, alpha). Lanza excepción si no existe"""
+        GestorImagenes._cargar_atlas()
+        clave = (ruta, tamaño, alpha)
+        if clave in cache_imagenes:
+            estadisticas_imagenes['aciertos'] += 1
+            return cache_imagenes[clave]
+
+        estadisticas_imagenes['fallos'] += 1
+        return GestorImagenes._guardar(clave, GestorImagenes._decodificar(ruta, tamaño))
+
+    @staticmethod
+    def cargar_imagen(ruta: str, tamaño: Optional[Tuple[int, int]] = None, color_fallback=None,
+                      alpha: bool = True, fallback: Optional[Callable[[], Optional[Surface]]] = None) -> Optional[Surface]:
+        """
+        Devuelve la imagen compartida para (ruta, tamaño, alpha), cargándola si hace falta.
+        Si la carga falla se usa `fallback()` o, en su defecto, una superficie del color indicado.
+        La superficie devuelta es compartida: no debe modificarse.
+        """
+        try:
+            return GestorImagenes.obtener(ruta, tamaño, alpha)
+        except Exception as e:
+            print(f"⚠️ Error al cargar {ruta}: {e}")
+            if fallback is not None:
+                superficie = fallback()
+            else:
+                superficie = Surface(tamaño or (1, 1), SRCALPHA)
                 if color_fallback:
                     superficie.fill(color_fallback)
-                cache_imagenes[ruta] = superficie
-        return cache_imagenes[ruta]
+            cache_imagenes[(ruta, tamaño, alpha)] = superficie
+            return superficie
 
     @staticmethod
-    def rotar_imagen(imagen: Surface, angulo: float) -> Surface:
-        """Rota una imagen con cache"""
-        clave = (id(imagen), angulo)
-        if clave not in cache_rotaciones:
-            cache_rotaciones[clave] = pygame.transform.rotate(imagen, angulo)
-        return cache_rotaciones[clave]
+    def _trabajos_imagenes(assets) -> list:
+        """Trabajos de carga de las imágenes que aún no están en el cache"""
+        trabajos = []
+        for ruta, tamaño, alpha in assets:
+            clave = (ruta, tamaño, alpha)
+            if clave in cache_imagenes:
+                continue
+
+            def registrar(imagen, clave=clave):
+                GestorImagenes._guardar(clave, imagen)
+            # Si falla no se cachea: el constructor que la pida aplicará su propio fallback
+            trabajos.append((ruta, lambda ruta=ruta, tamaño=tamaño: GestorImagenes._decodificar(ruta, tamaño),
+                             registrar, None))
+        return trabajos
+
+    @staticmethod
+    def trabajos_precarga(assets=None) -> list:
+        """
+        Lista de trabajos (nombre, decodificar, registrar, al_fallar) para cargar
+        todas las imágenes del juego (por defecto ASSETS_JUEGO). `decodificar` no
+        toca la ventana; `registrar` convierte y guarda en el cache desde el hilo
+        principal; `al_fallar` devuelve trabajos de reemplazo, si los hay.
+        """
+        global atlas_cargado
+        assets = ASSETS_JUEGO if assets is None else assets
+        if atlas_cargado:
+            return GestorImagenes._trabajos_imagenes(assets)
+        atlas_cargado = True
+        manifiesto = GestorImagenes._leer_manifiesto_atlas()
+        if manifiesto is None:
+            return GestorImagenes._trabajos_imagenes(assets)
+
+        # Lo que no esté en el atlas se lee de los PNG originales en paralelo
+        en_atlas = {(e["ruta"], tuple(e["tamaño"]) if e["tamaño"] is not None else None, e["alpha"])
+                    for e in manifiesto["entradas"]}
+        return [(RUTA_ATLAS, lambda: pygame.image.load(RUTA_ATLAS),
+                 lambda atlas: GestorImagenes._registrar_atlas(manifiesto, atlas),
+                 lambda: GestorImagenes._trabajos_imagenes([a for a in assets if a in en_atlas]))
+                ] + GestorImagenes._trabajos_imagenes([a for a in assets if a not in en_atlas])
+
+    @staticmethod
+    def precargar(assets=None):
+        """Carga de una vez todas las imágenes del juego (por defecto ASSETS_JUEGO)"""
+        CargadorAssets(GestorImagenes.trabajos_precarga(assets)).ejecutar()
+
+    @staticmethod
+    def estadisticas() -> Dict[str, int]:
+        """Devuelve aciertos, fallos, número de entradas y bytes de píxeles del cache de imágenes"""
+        superficies = {}
+        for imagen in cache_imagenes.values():
+            if imagen is not None:
+                # Una subsuperficie ocupa la memoria de su superficie raíz
+                raiz = imagen.get_abs_parent()
+                superficies[id(raiz)] = raiz.get_pitch() * raiz.get_height()
+        return {**estadisticas_imagenes, 'entradas': len(cache_imagenes), 'bytes': sum(superficies.values())}
+
+    @staticmethod
+    def tabla_direcciones(ruta: str, tamaño: Tuple[int, int], fallback=None) -> Dict[str, Surface]:
+        """Devuelve la imagen rotada para cada una de las 8 direcciones (se calcula una sola vez)"""
+        clave = (ruta, tamaño)
+        if clave not in cache_direcciones:
+            imagen = GestorImagenes.cargar_imagen(ruta, tamaño, fallback=fallback)
+            cache_direcciones[clave] = {
+                direccion: pygame.transform.rotate(imagen, angulo)
+                for direccion, angulo in ANGULOS_DIRECCION.items()
+            }
+        return cache_direcciones[clave]
 
     @staticmethod
     def crear_superficie_color(tamaño: Tuple[int, int], color: Tuple[int, int, int], alpha: int = 255) -> Surface:
@@ -128,6 +422,144 @@ class GestorImagenes:
         superficie.fill(color_con_alpha)
         return superficie
 
+class CargadorAssets:
+    """
+    Ejecuta trabajos de carga (nombre, decodificar, registrar, al_fallar).
+    La decodificación va a un pool de hilos (o se intercala con el bucle de
+    eventos en el navegador, donde no hay hilos) y el registro, que convierte
+    superficies al formato de pantalla, siempre corre en el hilo principal.
+    """
+    def __init__(self, trabajos, hilos=HILOS_CARGA):
+        self.trabajos = list(trabajos)
+        self.hilos = hilos if HAY_HILOS else 0
+        self.total = len(self.trabajos)
+        self.hechos = 0
+
+    def progreso(self) -> float:
+        return self.hechos / self.total if self.total else 1.0
+
+    def _terminar(self, trabajo, decodificar):
+        """Registra el resultado de un trabajo; devuelve los trabajos de reemplazo si falló"""
+        nombre, _, registrar, al_fallar = trabajo
+        self.hechos += 1
+        try:
+            registrar(decodificar())
+        except Exception as e:
+            print(f"⚠️ Error al precargar {nombre}: {e}")
+            if al_fallar is not None:
+                nuevos = al_fallar()
+                self.total += len(nuevos)
+                return nuevos
+        return []
+
+    def ejecutar(self):
+        """Carga todo en el hilo actual, sin ceder el control"""
+        pendientes = deque(self.trabajos)
+        while pendientes:
+            trabajo = pendientes.popleft()
+            pendientes.extend(self._terminar(trabajo, trabajo[1]))
+
+    async def ejecutar_async(self, al_avanzar=None):
+        """
+        Carga todo cediendo el control al bucle de eventos mientras tanto.
+        `al_avanzar(cargador)` se llama en el hilo principal tras cada espera,
+        por ejemplo para dibujar una pantalla de carga.
+        """
+        if not self.hilos:
+            pendientes = deque(self.trabajos)
+            while pendientes:
+                trabajo = pendientes.popleft()
+                pendientes.extend(self._terminar(trabajo, trabajo[1]))
+                if al_avanzar is not None:
+                    al_avanzar(self)
+                await asyncio.sleep(0)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.hilos) as pool:
+            futuros = {asyncio.wrap_future(pool.submit(t[1])): t for t in self.trabajos}
+            while futuros:
+                hechos, _ = await asyncio.wait(futuros, timeout=1 / FPS, return_when=asyncio.FIRST_COMPLETED)
+                for futuro in hechos:
+                    trabajo = futuros.pop(futuro)
+                    for nuevo in self._terminar(trabajo, futuro.result):
+                        futuros[asyncio.wrap_future(pool.submit(nuevo[1]))] = nuevo
+                if al_avanzar is not None:
+                    al_avanzar(self)
+
+class GestorEfectos:
+    """
+    Superficies de efectos dibujadas una sola vez por (forma, tamaño, nivel de alpha).
+    El alpha se redondea a PASO_ALPHA_EFECTOS, así cada efecto tiene una paleta
+    pequeña de niveles ya horneados y dibujarlo es solo un blit.
+    """
+    @staticmethod
+    def _nivel_alpha(alpha: float) -> int:
+        nivel = int(round(alpha / PASO_ALPHA_EFECTOS)) * PASO_ALPHA_EFECTOS
+        return max(0, min(255, nivel))
+
+    @staticmethod
+    def brillo(tamaño: Tuple[int, int], radio: int, color: Tuple[int, int, int], alpha: float) -> Surface:
+        """Círculo centrado en una superficie del tamaño dado"""
+        nivel = GestorEfectos._nivel_alpha(alpha)
+        clave = ('brillo', tamaño, radio, color, nivel)
+        if clave not in cache_efectos:
+            superficie = Surface(tamaño, SRCALPHA)
+            pygame.draw.circle(superficie, (*color, nivel), (tamaño[0] // 2, tamaño[1] // 2), radio)
+            cache_efectos[clave] = superficie
+        return cache_efectos[clave]
+
+    @staticmethod
+    def rectangulo(tamaño: Tuple[int, int], color: Tuple[int, int, int], alpha: float) -> Surface:
+        """Rectángulo de color uniforme y semitransparente"""
+        nivel = GestorEfectos._nivel_alpha(alpha)
+        clave = ('rectangulo', tamaño, color, nivel)
+        if clave not in cache_efectos:
+            # Sin alpha por píxel: un color sólido con alpha de superficie se mezcla más rápido
+            superficie = Surface(tamaño)
+            superficie.fill(color)
+            superficie.set_alpha(nivel)
+            cache_efectos[clave] = superficie
+        return cache_efectos[clave]
+
+    @staticmethod
+    def sombra(ancho: int, alto: int, alpha: float) -> Surface:
+        """Elipse negra semitransparente usada como sombra"""
+        nivel = GestorEfectos._nivel_alpha(alpha)
+        clave = ('sombra', ancho, alto, nivel)
+        if clave not in cache_efectos:
+            superficie = Surface((ancho, alto), SRCALPHA)
+            pygame.draw.ellipse(superficie, (0, 0, 0, nivel), (0, 0, ancho, alto))
+            cache_efectos[clave] = superficie
+        return cache_efectos[clave]
+
+class GestorTextos:
+    """
+    Textos rasterizados una sola vez por (fuente, texto, color).
+    El brillo de los títulos se redondea a PASO_BRILLO_TEXTO, así la animación
+    recorre una paleta pequeña de colores ya renderizados en lugar de volver
+    a rasterizar la fuente en cada frame.
+    """
+    @staticmethod
+    def render(fuente, texto: str, color: Tuple[int, int, int]) -> Surface:
+        clave = (fuente, texto, color)
+        superficie = cache_textos.get(clave)
+        if superficie is None:
+            superficie = fuente.render(texto, True, color)
+            cache_textos[clave] = superficie
+        return superficie
+
+    @staticmethod
+    def color_brillo(base: Tuple[int, int, int], tiempo_ms: float,
+                     velocidad: float = 0.002, intensidad: float = 50) -> Tuple[int, int, int]:
+        """Color del título aclarado según una onda |sin|, redondeado a un nivel fijo"""
+        brillo = abs(math.sin(tiempo_ms * velocidad)) * intensidad
+        nivel = int(round(brillo / PASO_BRILLO_TEXTO)) * PASO_BRILLO_TEXTO
+        return tuple(min(255, componente + nivel) for componente in base)
+
+def fondo_juego() -> Optional[Surface]:
+    """Fondo de la partida (compartido, precargado con ASSETS_JUEGO), o None si no existe"""
+    return GestorImagenes.cargar_imagen("images/fondo.png", alpha=False, fallback=lambda: None)
+
 def detectar_colision_circular(x1, y1, r1, x2, y2, r2):
     """Función de utilidad para detectar colisiones usando círculos"""
     dx = x1 - x2
@@ -135,177 +567,131 @@ def detectar_colision_circular(x1, y1, r1, x2, y2, r2):
     distancia = (dx * dx + dy * dy) ** 0.5
     return distancia < (r1 + r2)
 
+def unir_rects(rects):
+    """Rect que cubre todos los dados (se ignoran los None), o None si no hay ninguno"""
+    rects = [rect for rect in rects if rect]
+    if not rects:
+        return None
+    return rects[0].unionall(rects[1:])
+
 def mantener_en_pantalla(x, y, ancho, alto):
     """Función de utilidad para mantener objetos dentro de la pantalla"""
     x = max(0, min(ANCHO - ancho, x))
     y = max(0, min(ALTO - alto, y))
     return x, y
 
-# ============= CLASES DE ATAQUES =============
-class AtaqueEspecial:
-    """Clase para los ataques especiales que persiguen al objetivo"""
-    def __init__(self, x, y, objetivo):
-        self.x = x
-        self.y = y
-        self.velocidad = 3
-        self.objetivo = objetivo
-        self.tiempo_creacion = pygame.time.get_ticks()
-        self.duracion = 3000
-        self.radio = 15
-        try:
-            self.imagen = pygame.image.load("images/fuego_especial.png")
-            self.imagen = pygame.transform.scale(self.imagen, (30, 30))
-        except:
-            self.imagen = pygame.Surface((30, 30), pygame.SRCALPHA)
-            pygame.draw.circle(self.imagen, (255, 200, 0), (15, 15), 15)
-
-    def ha_expirado(self):
-        """Verifica si el ataque ha superado su tiempo de vida"""
-        return pygame.time.get_ticks() - self.tiempo_creacion > self.duracion
-
-    def mover(self):
-        """Mueve el ataque hacia el objetivo"""
-        dx = self.objetivo.x + self.objetivo.ancho/2 - self.x
-        dy = self.objetivo.y + self.objetivo.alto/2 - self.y
-        distancia = max(1, (dx**2 + dy**2)**0.5)
-        self.x += (dx / distancia) * self.velocidad
-        self.y += (dy / distancia) * self.velocidad
-
-    def dibujar(self, pantalla):
-        """Dibuja el ataque hacia el objetivo"""
-        pantalla.blit(self.imagen, (self.x, self.y))
-
-    def colisiona_con_jugador(self, jugador):
-        """Detecta colisión con el jugador usando círculos"""
-        return detectar_colision_circular(
-            self.x + self.radio, 
-            self.y + self.radio, 
-            self.radio,
-            jugador.x + jugador.ancho/2, 
-            jugador.y + jugador.alto/2, 
-            min(jugador.ancho, jugador.alto) / 2.5
-        )
-
-class AtaqueFuego:
-    """Clase para los ataques de fuego en línea recta"""
-    def __init__(self, x, y, direccion):
-        self.x = x
-        self.y = y
-        self.direccion = direccion
-        self.velocidad = 4
-        try:
-            self.imagen = pygame.image.load("images/fuego.png")
-            self.imagen = pygame.transform.scale(self.imagen, (20, 20))
-        except:
-            self.imagen = pygame.Surface((20, 20), pygame.SRCALPHA)
-            pygame.draw.circle(self.imagen, (255, 50, 0), (10, 10), 10)  # Rojo más brillante
-
-    def mover(self):
-        """Mueve el ataque en la dirección especificada"""
-        velocidad_diagonal = self.velocidad * 0.7071  # Ajuste para movimiento diagonal (1/√2)
-        
-        movimientos = {
-            "izquierda": (-self.velocidad, 0),
-            "derecha": (self.velocidad, 0),
-            "arriba": (0, -self.velocidad),
-            "abajo": (0, self.velocidad),
-            "arriba-derecha": (velocidad_diagonal, -velocidad_diagonal),
-            "arriba-izquierda": (-velocidad_diagonal, -velocidad_diagonal),
-            "abajo-derecha": (velocidad_diagonal, velocidad_diagonal),
-            "abajo-izquierda": (-velocidad_diagonal, velocidad_diagonal)
-        }
-        
-        dx, dy = movimientos.get(self.direccion, (0, 0))
-        self.x += dx
-        self.y += dy
-
-    def dibujar(self, pantalla):
-        """Dibuja el ataque con la rotación correcta"""
-        rotaciones = {
-            "izquierda": 180,
-            "derecha": 0,
-            "arriba": 90,
-            "abajo": -90,
-            "arriba-derecha": 45,
-            "arriba-izquierda": 135,
-            "abajo-derecha": -45,
-            "abajo-izquierda": -135
-        }
-        
-        angulo = rotaciones.get(self.direccion, 0)
-        imagen_rotada = pygame.transform.rotate(self.imagen, angulo)
-        pantalla.blit(imagen_rotada, (self.x, self.y))
-
-class AtaqueRayo:
-    """Clase para los ataques de rayo del oso"""
-    def __init__(self, x, y, direccion, es_especial=False):
-        self.x = x
-        self.y = y
-        self.direccion = direccion
-        self.velocidad = 6 if not es_especial else 8  # Ataque especial más rápido
-        self.es_especial = es_especial
-        try:
-            ruta = "images/rayo_especial.png" if es_especial else "images/rayo.png"
-            tamaño = (50, 50) if es_especial else (30, 30)
-            self.imagen = GestorImagenes.cargar_imagen(ruta, tamaño)
-        except Exception as e:
-            print(f"Error al cargar imagen de rayo: {e}")
-            color = AMARILLO if es_especial else (255, 255, 0)  # Amarillo para los rayos
-            self.imagen = self._crear_imagen_fallback(color, es_especial)
-
-    def _crear_imagen_fallback(self, color, es_especial):
-        if es_especial:
-            imagen = pygame.Surface((50, 50), pygame.SRCALPHA)
-            # Rayo especial más elaborado
-            pygame.draw.polygon(imagen, color, [
-                (25,0), (50,25), (35,25),   # Punta superior
-                (50,50), (25,50), (35,25),  # Parte inferior
-                (0,25), (15,25)             # Cola
-            ])
-            # Detalles brillantes
-            pygame.draw.line(imagen, BLANCO, (20,25), (40,25), 3)
+def crear_tabla_movimientos(velocidad):
+    """Precalcula el desplazamiento por frame en cada dirección para una velocidad"""
+    return {direccion: (ux * velocidad, uy * velocidad)
+            for direccion, (ux, uy) in VECTORES_DIRECCION.items()}
+
+TAMAÑO_CELDA_REJILLA = 80  # igual que una roca: cada roca ocupa como mucho 2x2 celdas
+# Con pocas rocas es más barato probar cada proyectil contra todas que mantener la rejilla
+UMBRAL_REJILLA_ROCAS = 8
+
+class RejillaEspacial:
+    """
+    Rejilla uniforme sobre la arena para la fase amplia de colisiones.
+    Cada objeto se guarda en las celdas que toca la caja de su círculo, y la
+    prueba exacta de círculos se hace solo con los objetos de las celdas que
+    tocan lo buscado. Solo compensa con muchos objetos (ver UMBRAL_REJILLA_ROCAS).
+    """
+    def __init__(self, tamaño_celda=TAMAÑO_CELDA_REJILLA, ancho=ANCHO, alto=ALTO):
+        self.tamaño_celda = tamaño_celda
+        self.columnas = ancho // tamaño_celda + 1
+        self.filas = alto // tamaño_celda + 1
+        self.celdas = [[] for _ in range(self.columnas * self.filas)]  # posiciones en `objetos`
+        self.ocupadas = set()
+        self.objetos = []  # en orden de inserción; la posición de cada uno es su índice estable
+        self._tabla = None  # versión en arrays, se rehace tras cada cambio
+
+    def _celdas_de(self, x, y, radio):
+        """Índices de las celdas que cubre la caja del círculo (recortada a la arena)"""
+        t = self.tamaño_celda
+        c0 = max(0, min(self.columnas - 1, int((x - radio) // t)))
+        c1 = max(0, min(self.columnas - 1, int((x + radio) // t)))
+        f0 = max(0, min(self.filas - 1, int((y - radio) // t)))
+        f1 = max(0, min(self.filas - 1, int((y + radio) // t)))
+        return [f * self.columnas + c for f in range(f0, f1 + 1) for c in range(c0, c1 + 1)]
+
+    def limpiar(self):
+        for indice in self.ocupadas:
+            self.celdas[indice].clear()
+        self.ocupadas.clear()
+        self.objetos.clear()
+        self._tabla = None
+
+    def insertar(self, objeto, x, y, radio):
+        posicion = len(self.objetos)
+        self.objetos.append(objeto)
+        self._tabla = None
+        for indice in self._celdas_de(x, y, radio):
+            self.celdas[indice].append(posicion)
+            self.ocupadas.add(indice)
+
+    def celdas_de_puntos(self, xs, ys):
+        """Índice de la celda de cada punto (arrays de NumPy), recortado a la arena"""
+        t = self.tamaño_celda
+        columnas = np.clip(xs // t, 0, self.columnas - 1).astype(np.intp)
+        filas = np.clip(ys // t, 0, self.filas - 1).astype(np.intp)
+        return filas * self.columnas + columnas
+
+    def tabla(self):
+        """
+        La rejilla en forma de arrays para consultas vectorizadas: devuelve
+        (objetos, tabla), con los objetos en orden de inserción y en cada fila
+        de la tabla las posiciones en `objetos` de los que ocupan esa celda,
+        rellenando con -1.
+        """
+        if self._tabla is None:
+            ancho = max((len(self.celdas[indice]) for indice in self.ocupadas), default=0)
+            tabla = np.full((len(self.celdas), ancho), -1, dtype=np.intp)
+            for indice in self.ocupadas:
+                posiciones = self.celdas[indice]
+                tabla[indice, :len(posiciones)] = posiciones
+            self._tabla = (list(self.objetos), tabla)
+        return self._tabla
+
+class PoolObjetos:
+    """
+    Reserva de objetos reutilizables de una misma clase. `adquirir` reinicia uno
+    libre (o crea uno nuevo si no queda ninguno) y `liberar` lo devuelve a la
+    reserva. La clase debe tener un método `reiniciar` que acepte los mismos
+    argumentos que su constructor. Liberar dos veces el mismo objeto es un
+    error: acabaría entregado a dos usuarios a la vez.
+    """
+    def __init__(self, clase):
+        self.clase = clase
+        self.libres = []
+        self.en_reserva = set()  # los mismos objetos que `libres`, para detectar dobles liberaciones
+        self.en_uso = 0
+        self.maximo_en_uso = 0  # marca más alta de objetos en uso a la vez
+        self.creados = 0
+
+    def adquirir(self, *args):
+        if self.libres:
+            objeto = self.libres.pop()
+            self.en_reserva.discard(objeto)
+            objeto.reiniciar(*args)
         else:
-            imagen = pygame.Surface((30, 30), pygame.SRCALPHA)
-            # Rayo normal más simple
-            pygame.draw.polygon(imagen, color, [(15,0), (30,15), (20,15), (30,30), (0,15), (10,15)])
-        return imagen
-
-    def mover(self):
-        """Mueve el rayo en la dirección especificada, incluyendo diagonales"""
-        velocidad_diagonal = self.velocidad * 0.7071  # Ajuste para movimiento diagonal (1/√2)
-        
-        movimientos = {
-            "izquierda": (-self.velocidad, 0),
-            "derecha": (self.velocidad, 0),
-            "arriba": (0, -self.velocidad),
-            "abajo": (0, self.velocidad),
-            "arriba-derecha": (velocidad_diagonal, -velocidad_diagonal),
-            "arriba-izquierda": (-velocidad_diagonal, -velocidad_diagonal),
-            "abajo-derecha": (velocidad_diagonal, velocidad_diagonal),
-            "abajo-izquierda": (-velocidad_diagonal, velocidad_diagonal)
-        }
-        
-        dx, dy = movimientos.get(self.direccion, (0, 0))
-        self.x += dx
-        self.y += dy
-
-    def dibujar(self, pantalla):
-        """Dibuja el rayo con la rotación correcta, incluyendo diagonales"""
-        rotaciones = {
-            "izquierda": 180,
-            "derecha": 0,
-            "arriba": 90,
-            "abajo": -90,
-            "arriba-derecha": 45,
-            "arriba-izquierda": 135,
-            "abajo-derecha": -45,
-            "abajo-izquierda": -135
-        }
-        
-        angulo = rotaciones.get(self.direccion, 0)
-        imagen_rotada = pygame.transform.rotate(self.imagen, angulo)
-        pantalla.blit(imagen_rotada, (self.x, self.y))
-
+            objeto = self.clase(*args)
+            self.creados += 1
+        self.en_uso += 1
+        self.maximo_en_uso = max(self.maximo_en_uso, self.en_uso)
+        return objeto
+
+    def liberar(self, objeto):
+        if objeto in self.en_reserva:
+            raise ValueError("El objeto ya está en la reserva: se ha liberado dos veces")
+        self.en_uso -= 1
+        self.libres.append(objeto)
+        self.en_reserva.add(objeto)
+
+    def estadisticas(self):
+        return {'en_uso': self.en_uso, 'libres': len(self.libres),
+                'maximo_en_uso': self.maximo_en_uso, 'creados': self.creados}
+
+# ============= CLASES DE OBJETOS DEL ESCENARIO =============
 class Roca:
     """Clase para las rocas que sirven como cobertura"""
     def __init__(self, x, y):
@@ -319,35 +705,27 @@ class Roca:
         self.vida = 30  # Vida inicial de la roca
         self.vida_maxima = 30
 
-        # Intentar cargar las imágenes con manejo de errores individual
-        try:
-            self.imagen_normal = pygame.image.load("images/roca.png")
-            self.imagen_normal = pygame.transform.scale(self.imagen_normal, (self.ancho, self.alto))
-        except:
-            print("⚠️ No se pudo cargar roca.png")
-            self.imagen_normal = pygame.Surface((self.ancho, self.alto))
-            pygame.draw.circle(self.imagen_normal, (100, 100, 100), (self.radio, self.radio), self.radio)
-
-        try:
-            self.imagen_grietas = pygame.image.load("images/roca_grietas.png")
-            self.imagen_grietas = pygame.transform.scale(self.imagen_grietas, (self.ancho, self.alto))
-        except:
-            print("⚠️ No se pudo cargar roca_grietas.png")
-            self.imagen_grietas = self.imagen_normal
-
-        try:
-            self.imagen_destruida = pygame.image.load("images/roca_destruida.png")
-            self.imagen_destruida = pygame.transform.scale(self.imagen_destruida, (self.ancho, self.alto))
-        except:
-            print("⚠️ No se pudo cargar roca_destruida.png")
-            self.imagen_destruida = self.imagen_normal
+        # Las imágenes se comparten entre todas las rocas a través del gestor
+        tamaño = (self.ancho, self.alto)
+        self.imagen_normal = GestorImagenes.cargar_imagen("images/roca.png", tamaño,
+                                                          fallback=self._crear_imagen_fallback)
+        self.imagen_grietas = GestorImagenes.cargar_imagen("images/roca_grietas.png", tamaño,
+                                                           fallback=lambda: self.imagen_normal)
+        self.imagen_destruida = GestorImagenes.cargar_imagen("images/roca_destruida.png", tamaño,
+                                                             fallback=lambda: self.imagen_normal)
 
         self.imagen = self.imagen_normal
         self.destruyendo = False
         self.tiempo_destruccion = None
 
-    def dibujar(self, pantalla):
-        """Dibuja la roca con su apariencia según su vida"""
+    @staticmethod
+    def _crear_imagen_fallback():
+        imagen = pygame.Surface((80, 80))
+        pygame.draw.circle(imagen, (100, 100, 100), (40, 40), 40)
+        return imagen
+
+    def imagen_actual(self):
+        """Apariencia de la roca según su vida"""
         vida_porcentaje = self.vida / self.vida_maxima
         if vida_porcentaje > 0.5:
             self.imagen = self.imagen_normal
@@ -355,7 +733,11 @@ class Roca:
             self.imagen = self.imagen_grietas
         else:
             self.imagen = self.imagen_destruida
-        pantalla.blit(self.imagen, (self.x, self.y))
+        return self.imagen
+
+    def dibujar(self, pantalla):
+        """Dibuja la roca con su apariencia según su vida"""
+        return pantalla.blit(self.imagen_actual(), (self.x, self.y))
 
     def recibir_dano(self, dano):
         """Procesa el daño recibido por la roca"""
@@ -363,7 +745,7 @@ class Roca:
         if self.vida <= 0 and not self.destruyendo:
             self.imagen = self.imagen_destruida
             self.destruyendo = True
-            self.tiempo_destruccion = pygame.time.get_ticks()
+            self.tiempo_destruccion = reloj_juego.ahora()
             return False
         elif self.vida <= self.vida_maxima * 0.5:
             self.imagen = self.imagen_grietas
@@ -381,41 +763,50 @@ class Roca:
     def actualizar(self):
         """Actualiza el estado de la roca"""
         if self.destruyendo:
-            tiempo_actual = pygame.time.get_ticks()
+            tiempo_actual = reloj_juego.ahora()
             if tiempo_actual - self.tiempo_destruccion > 500:
                 return True
         return False
 
 class ItemVida:
     """Clase para el ítem de vida que aparece aleatoriamente"""
+    __slots__ = ('x', 'y', 'velocidad', 'tiempo_creacion', 'duracion', 'angulo',
+                 'tiempo_cambio_direccion', 'delay_cambio_direccion', 'imagen')
+
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
         self.velocidad = 1.5
-        self.tiempo_creacion = pygame.time.get_ticks()
         self.duracion = 10000
-        self.angulo = random.uniform(0, 2 * 3.1416)
-        self.tiempo_cambio_direccion = pygame.time.get_ticks()
         self.delay_cambio_direccion = 3000
-        try:
-            self.imagen = pygame.image.load("images/vida.png")
-            self.imagen = pygame.transform.scale(self.imagen, (30, 30))
-        except:
-            self.imagen = pygame.Surface((30, 30), pygame.SRCALPHA)
-            pygame.draw.circle(self.imagen, (0, 255, 0), (15, 15), 15)  # Verde brillante
-            pygame.draw.circle(self.imagen, (255, 255, 255), (15, 15), 7)  # Centro blanco
+        self.imagen = GestorImagenes.cargar_imagen("images/vida.png", (TAMAÑO_ITEM, TAMAÑO_ITEM),
+                                                   fallback=self._crear_imagen_fallback)
+        self.reiniciar(x, y)
+
+    def reiniciar(self, x, y):
+        """Coloca el ítem como recién creado (para reutilizarlo desde un PoolObjetos)"""
+        self.x = x
+        self.y = y
+        self.tiempo_creacion = reloj_juego.ahora()
+        self.angulo = rng_juego.uniform(0, 2 * 3.1416)
+        self.tiempo_cambio_direccion = reloj_juego.ahora()
+
+    @staticmethod
+    def _crear_imagen_fallback():
+        imagen = pygame.Surface((30, 30), pygame.SRCALPHA)
+        pygame.draw.circle(imagen, (0, 255, 0), (15, 15), 15)  # Verde brillante
+        pygame.draw.circle(imagen, (255, 255, 255), (15, 15), 7)  # Centro blanco
+        return imagen
 
     def ha_expirado(self):
         """Verifica si el ítem ha superado su tiempo de vida"""
-        return pygame.time.get_ticks() - self.tiempo_creacion > self.duracion
+        return reloj_juego.ahora() - self.tiempo_creacion > self.duracion
 
     def mover(self):
         """Mueve el ítem con un movimiento más suave"""
-        tiempo_actual = pygame.time.get_ticks()
+        tiempo_actual = reloj_juego.ahora()
         
         # Cambiar dirección gradualmente
         if tiempo_actual - self.tiempo_cambio_direccion >= self.delay_cambio_direccion:
-            self.angulo = random.uniform(0, 2 * 3.1416)
+            self.angulo = rng_juego.uniform(0, 2 * 3.1416)
             self.tiempo_cambio_direccion = tiempo_actual
 
         # Mover en la dirección del ángulo actual
@@ -430,9 +821,12 @@ class ItemVida:
             
         self.x, self.y = mantener_en_pantalla(self.x, self.y, 30, 30)
 
+    def imagen_actual(self):
+        return self.imagen
+
     def dibujar(self, pantalla):
         """Dibuja el ítem en la pantalla"""
-        pantalla.blit(self.imagen, (self.x, self.y))
+        return pantalla.blit(self.imagen, (self.x, self.y))
 
     def colisiona_con_jugador(self, jugador):
         """Detecta si el jugador ha recogido el ítem"""
@@ -440,34 +834,43 @@ class ItemVida:
 
 class ItemEnergia:
     """Clase para el ítem de energía que aparece aleatoriamente"""
+    __slots__ = ('x', 'y', 'velocidad', 'tiempo_creacion', 'duracion', 'angulo',
+                 'tiempo_cambio_direccion', 'delay_cambio_direccion', 'imagen')
+
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
         self.velocidad = 1.5
-        self.tiempo_creacion = pygame.time.get_ticks()
         self.duracion = 8000
-        self.angulo = random.uniform(0, 2 * 3.1416)
-        self.tiempo_cambio_direccion = pygame.time.get_ticks()
         self.delay_cambio_direccion = 3000
-        try:
-            self.imagen = pygame.image.load("images/energia.png")
-            self.imagen = pygame.transform.scale(self.imagen, (30, 30))
-        except:
-            self.imagen = pygame.Surface((30, 30), pygame.SRCALPHA)
-            pygame.draw.circle(self.imagen, (255, 255, 0), (15, 15), 15)  # Amarillo brillante
-            pygame.draw.polygon(self.imagen, (255, 255, 255), [(15,5), (25,15), (15,25), (5,15)])  # Rayo blanco
+        self.imagen = GestorImagenes.cargar_imagen("images/energia.png", (TAMAÑO_ITEM, TAMAÑO_ITEM),
+                                                   fallback=self._crear_imagen_fallback)
+        self.reiniciar(x, y)
+
+    def reiniciar(self, x, y):
+        """Coloca el ítem como recién creado (para reutilizarlo desde un PoolObjetos)"""
+        self.x = x
+        self.y = y
+        self.tiempo_creacion = reloj_juego.ahora()
+        self.angulo = rng_juego.uniform(0, 2 * 3.1416)
+        self.tiempo_cambio_direccion = reloj_juego.ahora()
+
+    @staticmethod
+    def _crear_imagen_fallback():
+        imagen = pygame.Surface((30, 30), pygame.SRCALPHA)
+        pygame.draw.circle(imagen, (255, 255, 0), (15, 15), 15)  # Amarillo brillante
+        pygame.draw.polygon(imagen, (255, 255, 255), [(15,5), (25,15), (15,25), (5,15)])  # Rayo blanco
+        return imagen
 
     def ha_expirado(self):
         """Verifica si el ítem ha superado su tiempo de vida"""
-        return pygame.time.get_ticks() - self.tiempo_creacion > self.duracion
+        return reloj_juego.ahora() - self.tiempo_creacion > self.duracion
 
     def mover(self):
         """Mueve el ítem con un movimiento más suave"""
-        tiempo_actual = pygame.time.get_ticks()
+        tiempo_actual = reloj_juego.ahora()
         
         # Cambiar dirección gradualmente
         if tiempo_actual - self.tiempo_cambio_direccion >= self.delay_cambio_direccion:
-            self.angulo = random.uniform(0, 2 * 3.1416)
+            self.angulo = rng_juego.uniform(0, 2 * 3.1416)
             self.tiempo_cambio_direccion = tiempo_actual
 
         # Mover en la dirección del ángulo actual
@@ -482,15 +885,471 @@ class ItemEnergia:
             
         self.x, self.y = mantener_en_pantalla(self.x, self.y, 30, 30)
 
+    def imagen_actual(self):
+        return self.imagen
+
     def dibujar(self, pantalla):
         """Dibuja el ítem en la pantalla"""
-        pantalla.blit(self.imagen, (self.x, self.y))
+        return pantalla.blit(self.imagen, (self.x, self.y))
 
     def colisiona_con_jugador(self, jugador):
         """Detecta si el jugador ha recogido el ítem"""
         return detectar_colision_circular(self.x, self.y, 15, jugador.x, jugador.y, min(jugador.ancho, jugador.alto) / 2.5)
 
+# ============= SISTEMA DE PROYECTILES =============
+# Tipos de proyectil y dueños (quién lo disparó)
+PROYECTIL_RAYO = 0
+PROYECTIL_RAYO_ESPECIAL = 1
+PROYECTIL_FUEGO = 2
+PROYECTIL_FUEGO_ESPECIAL = 3
+DUEÑO_JUGADOR = 0
+DUEÑO_ENEMIGO = 1
+
+CAPACIDAD_PROYECTILES = 256  # huecos iniciales; se duplica si se llenan
+# Con hasta tantos proyectiles vivos un bucle de Python sale más barato que el
+# coste fijo de cada llamada a NumPy; por encima se procesan todos a la vez
+UMBRAL_VECTORIAL = 64
+RADIO_PROYECTIL_ROCA = 15  # todos los proyectiles chocan con las rocas con este radio
+DIRECCIONES = list(VECTORES_DIRECCION)
+
+# Propiedades de cada tipo, indexadas por el número de tipo
+VELOCIDAD_PROYECTIL = np.array([6.0, 8.0, 4.0, 3.0])  # el rayo especial es más rápido
+DAÑO_PROYECTIL = (10, 20, 10, 15)
+DURACION_PROYECTIL = np.array([np.inf, np.inf, np.inf, 3000.0])  # ms; los rectos no caducan
+PERSIGUE_PROYECTIL = np.array([False, False, False, True])  # los que persiguen no se descartan al salir
+# Giro máximo por tick (radianes) de los que persiguen; np.inf apunta directo al objetivo.
+# Un valor finito (p. ej. 0.05) hace el fuego especial esquivable en dificultades altas
+GIRO_FUEGO_ESPECIAL = np.inf
+GIRO_MAXIMO_PROYECTIL = np.array([np.inf, np.inf, np.inf, GIRO_FUEGO_ESPECIAL])
+# Centro del círculo de colisión respecto a (x, y): contra rocas y contra personajes
+CENTRO_ROCA_PROYECTIL = np.array([0.0, 0.0, 15.0, 15.0])
+CENTRO_PERSONAJE_PROYECTIL = np.array([0.0, 0.0, 10.0, 15.0])
+RADIO_PROYECTIL = (15, 15, 10, 15)  # radio contra personajes
+MOVIMIENTOS_PROYECTIL = (crear_tabla_movimientos(6), crear_tabla_movimientos(8),
+                         crear_tabla_movimientos(4), {})
+
+_CAMPOS_PROYECTIL = (
+    ('x', np.float64), ('y', np.float64),
+    ('x_anterior', np.float64), ('y_anterior', np.float64),
+    ('vx', np.float64), ('vy', np.float64),
+    ('radio', np.float64),
+    ('tipo', np.int8), ('dueño', np.int8), ('direccion', np.int8),
+    ('tiempo_creacion', np.float64),
+    ('vivo', np.bool_),
+)
+
+def _imagen_rayo(es_especial):
+    color = AMARILLO if es_especial else (255, 255, 0)  # Amarillo para los rayos
+    if es_especial:
+        imagen = pygame.Surface((50, 50), pygame.SRCALPHA)
+        # Rayo especial más elaborado
+        pygame.draw.polygon(imagen, color, [
+            (25,0), (50,25), (35,25),   # Punta superior
+            (50,50), (25,50), (35,25),  # Parte inferior
+            (0,25), (15,25)             # Cola
+        ])
+        # Detalles brillantes
+        pygame.draw.line(imagen, BLANCO, (20,25), (40,25), 3)
+    else:
+        imagen = pygame.Surface((30, 30), pygame.SRCALPHA)
+        # Rayo normal más simple
+        pygame.draw.polygon(imagen, color, [(15,0), (30,15), (20,15), (30,30), (0,15), (10,15)])
+    return imagen
+
+def _imagen_fuego():
+    imagen = pygame.Surface((20, 20), pygame.SRCALPHA)
+    pygame.draw.circle(imagen, (255, 50, 0), (10, 10), 10)  # Rojo más brillante
+    return imagen
+
+def _imagen_fuego_especial():
+    imagen = pygame.Surface((30, 30), pygame.SRCALPHA)
+    pygame.draw.circle(imagen, (255, 200, 0), (15, 15), 15)
+    return imagen
+
+# Imagen de cada tipo: (ruta, tamaño, fallback, si se rota según la dirección)
+IMAGENES_PROYECTIL = (
+    ("images/rayo.png", (30, 30), lambda: _imagen_rayo(False), True),
+    ("images/rayo_especial.png", (50, 50), lambda: _imagen_rayo(True), True),
+    ("images/fuego.png", (20, 20), _imagen_fuego, True),
+    ("images/fuego_especial.png", (30, 30), _imagen_fuego_especial, False),
+)
+
+sprites_proyectiles = []  # por tipo, la imagen de cada índice de DIRECCIONES
+
+def _sprites_proyectiles():
+    """
+    Imágenes de los proyectiles con aceleración RLE: son casi todo píxeles
+    transparentes y con miles en pantalla el blit codificado por rachas es
+    unas tres veces más rápido (en los bordes semitransparentes puede
+    diferir en 1-2 niveles de color del blit normal).
+    """
+    if not sprites_proyectiles:
+        copias = {}  # id(imagen) -> copia acelerada, para no duplicar imágenes compartidas
+        for ruta, tamaño, fallback, rota in IMAGENES_PROYECTIL:
+            if rota:
+                tabla = GestorImagenes.tabla_direcciones(ruta, tamaño, fallback)
+                imagenes = [tabla[direccion] for direccion in DIRECCIONES]
+            else:
+                imagenes = [GestorImagenes.cargar_imagen(ruta, tamaño, fallback=fallback)] * len(DIRECCIONES)
+            for imagen in imagenes:
+                if id(imagen) not in copias:
+                    copias[id(imagen)] = imagen.copy()
+                    copias[id(imagen)].set_alpha(255, pygame.RLEACCEL)
+            sprites_proyectiles.append([copias[id(imagen)] for imagen in imagenes])
+    return sprites_proyectiles
+
+def integrar_persecucion(x, y, vx, vy, objetivo_x, objetivo_y, velocidad, giro_maximo, vigentes):
+    """
+    Avanza un tick a todos los proyectiles que persiguen, en una sola pasada de
+    NumPy (un elemento por proyectil en cada array). Cada uno orienta su
+    velocidad hacia su objetivo girando como mucho `giro_maximo` radianes
+    (np.inf: apunta directo, y también el primer tick, cuando aún no tiene
+    velocidad). Los que no están `vigentes` (pasaron su vida máxima) no se
+    tocan. Devuelve los nuevos x, y, vx, vy.
+    """
+    dx = objetivo_x - x
+    dy = objetivo_y - y
+    distancia = np.maximum(1, np.sqrt(dx * dx + dy * dy))
+    nuevo_vx = (dx / distancia) * velocidad
+    nuevo_vy = (dy / distancia) * velocidad
+
+    limitados = vigentes & np.isfinite(giro_maximo) & ((vx != 0) | (vy != 0))
+    if limitados.any():
+        actual = np.arctan2(vy[limitados], vx[limitados])
+        giro = np.arctan2(dy[limitados], dx[limitados]) - actual
+        giro = (giro + np.pi) % (2 * np.pi) - np.pi  # el giro más corto, en [-pi, pi)
+        angulo = actual + np.clip(giro, -giro_maximo[limitados], giro_maximo[limitados])
+        nuevo_vx[limitados] = np.cos(angulo) * velocidad[limitados]
+        nuevo_vy[limitados] = np.sin(angulo) * velocidad[limitados]
+
+    nuevo_vx = np.where(vigentes, nuevo_vx, vx)
+    nuevo_vy = np.where(vigentes, nuevo_vy, vy)
+    return (np.where(vigentes, x + nuevo_vx, x), np.where(vigentes, y + nuevo_vy, y),
+            nuevo_vx, nuevo_vy)
+
+def perseguir(x, y, vx, vy, objetivo_x, objetivo_y, velocidad, giro_maximo):
+    """
+    integrar_persecucion() para un solo proyectil vigente. Los ángulos se
+    calculan con NumPy y no con math: sus arctan2/cos/sin pueden diferir en el
+    último bit, y las dos versiones deben dar exactamente lo mismo.
+    """
+    dx = objetivo_x - x
+    dy = objetivo_y - y
+    distancia = max(1, math.sqrt(dx * dx + dy * dy))
+    nuevo_vx = (dx / distancia) * velocidad
+    nuevo_vy = (dy / distancia) * velocidad
+    if math.isfinite(giro_maximo) and (vx != 0 or vy != 0):
+        actual = np.arctan2(vy, vx)
+        giro = (np.arctan2(dy, dx) - actual + np.pi) % (2 * np.pi) - np.pi
+        angulo = actual + np.clip(giro, -giro_maximo, giro_maximo)
+        nuevo_vx = np.cos(angulo) * velocidad
+        nuevo_vy = np.sin(angulo) * velocidad
+    return x + nuevo_vx, y + nuevo_vy, nuevo_vx, nuevo_vy
+
+class SistemaProyectiles:
+    """
+    Todos los proyectiles de la partida en arrays de NumPy, un array por campo,
+    en lugar de un objeto por ataque. Los huecos de los proyectiles que
+    desaparecen se reutilizan. Con más de UMBRAL_VECTORIAL vivos, mover,
+    descartar y probar colisiones se hace para todos a la vez con operaciones
+    vectorizadas; con menos, proyectil a proyectil con las mismas cuentas.
+    """
+    def __init__(self, capacidad=CAPACIDAD_PROYECTILES):
+        self.capacidad = 0
+        self.tope = 0  # los huecos desde aquí no se han usado nunca
+        self.libres = []
+        self.disparados = 0
+        # Hueco -> tipo de cada proyectil vivo, en orden de disparo (todos y por dueño)
+        self.en_vuelo = {}
+        self.de_dueño = ({}, {})
+        self._reservar(capacidad)
+
+    @property
+    def vivos(self):
+        return len(self.en_vuelo)
+
+    def _reservar(self, capacidad):
+        """Crea los arrays o los amplía conservando su contenido"""
+        for nombre, tipo in _CAMPOS_PROYECTIL:
+            nuevo = np.zeros(capacidad, dtype=tipo)
+            if self.capacidad:
+                nuevo[:self.capacidad] = getattr(self, nombre)
+            setattr(self, nombre, nuevo)
+        self.capacidad = capacidad
+
+    def disparar(self, tipo, dueño, x, y, direccion=None):
+        """Crea un proyectil; los que persiguen calculan su velocidad al moverse"""
+        if self.libres:
+            i = self.libres.pop()
+        else:
+            if self.tope == self.capacidad:
+                self._reservar(self.capacidad * 2)
+            i = self.tope
+            self.tope += 1
+        self.x[i] = self.x_anterior[i] = x
+        self.y[i] = self.y_anterior[i] = y
+        self.vx[i], self.vy[i] = MOVIMIENTOS_PROYECTIL[tipo].get(direccion, (0, 0))
+        self.radio[i] = RADIO_PROYECTIL[tipo]
+        self.tipo[i] = tipo
+        self.dueño[i] = dueño
+        self.direccion[i] = DIRECCIONES.index(direccion) if direccion in VECTORES_DIRECCION else 0
+        self.tiempo_creacion[i] = reloj_juego.ahora()
+        self.vivo[i] = True
+        self.en_vuelo[i] = tipo
+        self.de_dueño[dueño][i] = tipo
+        self.disparados += 1
+        return i
+
+    def liberar(self, indices):
+        """Elimina el proyectil o los proyectiles indicados y deja sus huecos libres"""
+        for i in np.atleast_1d(indices).tolist():
+            del self.en_vuelo[i]
+            del self.de_dueño[self.dueño[i]][i]
+            self.vivo[i] = False
+            self.libres.append(i)
+
+    def _pocos(self):
+        return len(self.en_vuelo) <= UMBRAL_VECTORIAL
+
+    def activos(self, dueño=None):
+        """Índices de los proyectiles vivos (de un dueño, si se indica) en orden de disparo"""
+        en_vuelo = self.en_vuelo if dueño is None else self.de_dueño[dueño]
+        return np.fromiter(en_vuelo, dtype=np.intp, count=len(en_vuelo))
+
+    def cantidad(self, dueño=None):
+        return len(self.en_vuelo if dueño is None else self.de_dueño[dueño])
+
+    def estadisticas(self):
+        """Ocupación de los huecos; `tope` es la marca más alta de proyectiles vivos a la vez"""
+        return {'en_uso': self.vivos, 'libres': self.capacidad - self.vivos,
+                'maximo_en_uso': self.tope, 'creados': self.disparados}
+
+    def posiciones(self, dueño):
+        """Lista de (x, y) de los proyectiles vivos de un dueño, en orden de disparo"""
+        indices = self.activos(dueño)
+        return list(zip(self.x[indices].tolist(), self.y[indices].tolist()))
+
+    def guardar_posiciones(self):
+        """Guarda la posición al inicio del tick, para interpolar al dibujar"""
+        self.x_anterior[:self.tope] = self.x[:self.tope]
+        self.y_anterior[:self.tope] = self.y[:self.tope]
+
+    def mover(self, objetivos):
+        """
+        Avanza todos los proyectiles un tick. Los que persiguen se dirigen
+        al centro de `objetivos[dueño]`, el personaje rival de quien disparó.
+        """
+        if not self.en_vuelo:
+            return
+        if self._pocos():
+            self._mover_uno_a_uno(objetivos)
+            return
+        n = self.tope
+        vivo = self.vivo[:n]
+        persigue = PERSIGUE_PROYECTIL[self.tipo[:n]]
+        persiguen = np.flatnonzero(vivo & persigue)
+        if len(persiguen):
+            dueños = self.dueño[persiguen]
+            tipos = self.tipo[persiguen]
+            objetivo_x = np.empty(len(persiguen))
+            objetivo_y = np.empty(len(persiguen))
+            for dueño, objetivo in enumerate(objetivos):
+                de_dueño = dueños == dueño
+                objetivo_x[de_dueño] = objetivo.x + objetivo.ancho/2
+                objetivo_y[de_dueño] = objetivo.y + objetivo.alto/2
+            # Los caducados se quedan quietos: descartar() los quita en este mismo tick
+            edad = reloj_juego.ahora() - self.tiempo_creacion[persiguen]
+            (self.x[persiguen], self.y[persiguen],
+             self.vx[persiguen], self.vy[persiguen]) = integrar_persecucion(
+                self.x[persiguen], self.y[persiguen], self.vx[persiguen], self.vy[persiguen],
+                objetivo_x, objetivo_y, VELOCIDAD_PROYECTIL[tipos],
+                GIRO_MAXIMO_PROYECTIL[tipos], edad <= DURACION_PROYECTIL[tipos])
+        rectos = vivo & ~persigue
+        np.add(self.x[:n], self.vx[:n], out=self.x[:n], where=rectos)
+        np.add(self.y[:n], self.vy[:n], out=self.y[:n], where=rectos)
+
+    def _mover_uno_a_uno(self, objetivos):
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        ahora = reloj_juego.ahora()
+        for i, tipo in self.en_vuelo.items():
+            if not PERSIGUE_PROYECTIL[tipo]:
+                x[i] += vx[i]
+                y[i] += vy[i]
+            elif ahora - self.tiempo_creacion[i] <= DURACION_PROYECTIL[tipo]:
+                objetivo = objetivos[self.dueño[i]]
+                x[i], y[i], vx[i], vy[i] = perseguir(
+                    x[i], y[i], vx[i], vy[i],
+                    objetivo.x + objetivo.ancho/2, objetivo.y + objetivo.alto/2,
+                    VELOCIDAD_PROYECTIL[tipo], GIRO_MAXIMO_PROYECTIL[tipo])
+
+    def descartar(self, tiempo_actual):
+        """Elimina los proyectiles rectos que salen de pantalla y los que caducan"""
+        if not self.en_vuelo:
+            return
+        if self._pocos():
+            x, y, creacion = self.x, self.y, self.tiempo_creacion
+            self.liberar([i for i, tipo in self.en_vuelo.items()
+                          if tiempo_actual - creacion[i] > DURACION_PROYECTIL[tipo]
+                          or (not PERSIGUE_PROYECTIL[tipo]
+                              and (x[i] < 0 or x[i] > ANCHO or y[i] < 0 or y[i] > ALTO))])
+            return
+        n = self.tope
+        x, y, tipo = self.x[:n], self.y[:n], self.tipo[:n]
+        fuera = (x < 0) | (x > ANCHO) | (y < 0) | (y > ALTO)
+        fuera &= ~PERSIGUE_PROYECTIL[tipo]
+        caducados = tiempo_actual - self.tiempo_creacion[:n] > DURACION_PROYECTIL[tipo]
+        self.liberar(np.flatnonzero(self.vivo[:n] & (fuera | caducados)))
+
+    def impactos_rocas(self, rocas, rejilla=None):
+        """
+        Proyectiles vivos que tocan alguna roca, como lista de (índice, roca)
+        en orden de disparo; cada uno con la primera roca de `rocas` que toca.
+        Sin rejilla se prueba cada proyectil contra todas las rocas; con ella,
+        las rocas deben estar insertadas en el mismo orden con su radio más
+        RADIO_PROYECTIL_ROCA, y basta mirar la celda del centro de cada proyectil.
+        """
+        if not self.en_vuelo or not rocas:
+            return []
+        if rejilla is None and self._pocos():
+            impactos = []
+            for i, tipo in self.en_vuelo.items():
+                cx = self.x[i] + CENTRO_ROCA_PROYECTIL[tipo]
+                cy = self.y[i] + CENTRO_ROCA_PROYECTIL[tipo]
+                for roca in rocas:
+                    dx = cx - roca.centro_x
+                    dy = cy - roca.centro_y
+                    if math.sqrt(dx * dx + dy * dy) < roca.radio + RADIO_PROYECTIL_ROCA:
+                        impactos.append((i, roca))
+                        break
+            return impactos
+
+        indices = self.activos()
+        tipos = self.tipo[indices]
+        cx = self.x[indices] + CENTRO_ROCA_PROYECTIL[tipos]
+        cy = self.y[indices] + CENTRO_ROCA_PROYECTIL[tipos]
+        if rejilla is None:
+            candidatas = np.broadcast_to(np.arange(len(rocas)), (len(indices), len(rocas)))
+        else:
+            rocas, tabla = rejilla.tabla()
+            candidatas = tabla[rejilla.celdas_de_puntos(cx, cy)]  # (proyectiles, rocas por celda)
+        # Centro y radio de cada roca; la posición -1 (sin roca) cae en el último elemento
+        roca_x = np.array([roca.centro_x for roca in rocas] + [0.0])[candidatas]
+        roca_y = np.array([roca.centro_y for roca in rocas] + [0.0])[candidatas]
+        roca_radio = np.array([roca.radio for roca in rocas] + [0.0])[candidatas]
+        dx = cx[:, None] - roca_x
+        dy = cy[:, None] - roca_y
+        tocan = (np.sqrt(dx * dx + dy * dy) < roca_radio + RADIO_PROYECTIL_ROCA) & (candidatas >= 0)
+        con_impacto = np.flatnonzero(tocan.any(axis=1))
+        primera = tocan.argmax(axis=1)
+        return [(indices[k], rocas[candidatas[k, primera[k]]]) for k in con_impacto]
+
+    def impactos_personaje(self, dueño, personaje):
+        """Índices de los proyectiles vivos de `dueño` que tocan a `personaje`, en orden de disparo"""
+        centro_x = personaje.x + personaje.ancho/2
+        centro_y = personaje.y + personaje.alto/2
+        radio_personaje = min(personaje.ancho, personaje.alto) / 2.5
+        if self._pocos():
+            impactos = []
+            for i, tipo in self.de_dueño[dueño].items():
+                dx = self.x[i] + CENTRO_PERSONAJE_PROYECTIL[tipo] - centro_x
+                dy = self.y[i] + CENTRO_PERSONAJE_PROYECTIL[tipo] - centro_y
+                if math.sqrt(dx * dx + dy * dy) < self.radio[i] + radio_personaje:
+                    impactos.append(i)
+            return impactos
+
+        indices = self.activos(dueño)
+        tipos = self.tipo[indices]
+        dx = self.x[indices] + CENTRO_PERSONAJE_PROYECTIL[tipos] - centro_x
+        dy = self.y[indices] + CENTRO_PERSONAJE_PROYECTIL[tipos] - centro_y
+        return indices[np.sqrt(dx * dx + dy * dy) < self.radio[indices] + radio_personaje]
+
+    def dibujar(self, pantalla, alpha=1.0):
+        """
+        Dibuja los proyectiles del jugador y luego los del enemigo, interpolados
+        con `alpha`, en una sola llamada a blits. Devuelve los rectángulos dibujados.
+        """
+        elementos = self.elementos_dibujo(DUEÑO_JUGADOR, alpha) + self.elementos_dibujo(DUEÑO_ENEMIGO, alpha)
+        if not elementos:
+            return []
+        return pantalla.blits([(imagen, (x, y)) for imagen, x, y in elementos])
+
+    def elementos_dibujo(self, dueño, alpha=1.0):
+        """(imagen, x, y) de cada proyectil vivo de `dueño`, en orden de disparo e interpolados"""
+        de_dueño = self.de_dueño[dueño]
+        if not de_dueño:
+            return []
+        sprites = _sprites_proyectiles()
+        indices = self.activos(dueño)
+        x, y = self.x[indices], self.y[indices]
+        if alpha < 1.0:
+            x = self.x_anterior[indices] + (x - self.x_anterior[indices]) * alpha
+            y = self.y_anterior[indices] + (y - self.y_anterior[indices]) * alpha
+        return [(sprites[tipo][direccion], px, py) for tipo, direccion, px, py in zip(
+            de_dueño.values(), self.direccion[indices].tolist(), x.tolist(), y.tolist())]
+
 # ============= CLASE PERSONAJE =============
+cache_barras_recarga = {}  # relleno en px -> superficie de la barra de recarga
+
+# Hoja de sprites de cada personaje (4 frames por fila: idle, walk, attack)
+HOJAS_PERSONAJES = {
+    "oso": "images/oso_sprites.png",
+    "puma": "images/puma_sprites.png",
+    "puma2": "images/puma2_sprites.png",  # el puma evolucionado
+}
+ESTADOS_ANIMACION = ('idle', 'walk', 'attack')
+FRAMES_POR_CLIP = 4  # columnas de cada fila de la hoja
+
+# Animaciones ya cortadas por (hoja, tamaño de frame) -> (sprites, banco de frames)
+cache_clips: Dict[Tuple[str, Tuple[int, int]], tuple] = {}
+
+class GestorAnimaciones:
+    """
+    Corta cada hoja de sprites una sola vez por tamaño de frame. Todos los
+    personajes que usan la misma hoja comparten las mismas tuplas de frames,
+    así crear un personaje (o evolucionar) no corta ni voltea nada.
+    """
+    @staticmethod
+    def _cortar_fila(hoja: Surface, fila: int, tamaño: Tuple[int, int]) -> Tuple[Surface, ...]:
+        """Los 4 frames de una fila de la hoja, escalados al tamaño dado"""
+        frames = []
+        ancho_frame = hoja.get_width() // FRAMES_POR_CLIP
+        alto_frame = hoja.get_height() // len(ESTADOS_ANIMACION)
+        for columna in range(FRAMES_POR_CLIP):
+            frame = pygame.Surface((ancho_frame, alto_frame), pygame.SRCALPHA)
+            frame.blit(hoja, (0, 0), (columna * ancho_frame, fila * alto_frame, ancho_frame, alto_frame))
+            frames.append(pygame.transform.scale(frame, tamaño))
+        return tuple(frames)
+
+    @staticmethod
+    def clips(ruta: str, tamaño: Tuple[int, int]):
+        """
+        (sprites, banco_frames) de la hoja: sprites[estado] son los frames tal
+        cual y banco_frames[(estado, mirando_derecha)] ya tiene las dos
+        orientaciones. Compartidos: no deben modificarse. Lanza excepción si la
+        hoja no se puede cargar.
+        """
+        clave = (ruta, tamaño)
+        if clave not in cache_clips:
+            hoja = GestorImagenes.obtener(ruta)
+            sprites = {}
+            banco_frames = {}
+            for fila, estado in enumerate(ESTADOS_ANIMACION):
+                frames = GestorAnimaciones._cortar_fila(hoja, fila, tamaño)
+                sprites[estado] = frames
+                banco_frames[(estado, False)] = frames
+                banco_frames[(estado, True)] = tuple(pygame.transform.flip(frame, True, False) for frame in frames)
+            cache_clips[clave] = (sprites, banco_frames)
+        return cache_clips[clave]
+
+    @staticmethod
+    def precargar(tamaño=(TAMAÑO_PERSONAJE, TAMAÑO_PERSONAJE)):
+        """Corta de antemano las hojas de todos los personajes (incluido el puma evolucionado)"""
+        for nombre, ruta in HOJAS_PERSONAJES.items():
+            try:
+                GestorAnimaciones.clips(ruta, tamaño)
+            except Exception as e:
+                print(f"⚠️ Error al precargar las animaciones de {nombre}: {e}")
+
 class Personaje:
     """Clase principal para los personajes del juego"""
     def __init__(self, nombre, x, y):
@@ -507,7 +1366,6 @@ class Personaje:
         self.color = (255, 0, 0)  # Rojo
         self.ancho = TAMAÑO_PERSONAJE
         self.alto = TAMAÑO_PERSONAJE
-        self.ataques = []
         self.ataques_jugador = []
         self.parpadeo = False
         self.ultimo_golpe = 0
@@ -521,7 +1379,7 @@ class Personaje:
         self.ataques_normales_disponibles = 3  # Máximo de ataques normales
         self.ataques_normales_maximos = 3  # Añadir esta línea
         self.tiempo_recarga_ataques = 3000  # segundos de recarga
-        self.ultimo_tiempo_recarga = pygame.time.get_ticks()
+        self.ultimo_tiempo_recarga = reloj_juego.ahora()
         self.evolucionado = False
         self.tiempo_evolucion = 0
         self.alpha_evolucion = 0
@@ -529,129 +1387,40 @@ class Personaje:
         
         # Nuevos atributos para animación
         self.frame_actual = 0
-        self.tiempo_ultimo_frame = pygame.time.get_ticks()
-        self.delay_animacion = 150  # Valor base para todas las animaciones
+        self.tiempo_ultimo_frame = reloj_juego.ahora()
         self.estado_animacion = 'idle'  # idle, walk, attack
         self.sprites = {}
+        # Frames por (estado, mirando_derecha): ambas orientaciones ya volteadas
+        self.banco_frames = {}
         
         # Cargar sprites
         try:
-            # Intentar cargar las hojas de sprites
-            if self.nombre == "oso":
-                sprite_sheet = pygame.image.load("images/oso_sprites.png").convert_alpha()
-                # Primera fila (0): idle
-                self.sprites['idle'] = self._cargar_frames(sprite_sheet, 0)
-                # Segunda fila (1): walk
-                self.sprites['walk'] = self._cargar_frames(sprite_sheet, 1)
-                # Tercera fila (2): attack
-                self.sprites['attack'] = self._cargar_frames(sprite_sheet, 2)
-            elif self.nombre == "puma":
-                sprite_sheet = pygame.image.load("images/puma_sprites.png").convert_alpha()
-                self.sprites['idle'] = self._cargar_frames(sprite_sheet, 0)
-                self.sprites['walk'] = self._cargar_frames(sprite_sheet, 1)
-                self.sprites['attack'] = self._cargar_frames(sprite_sheet, 2)
+            # Las animaciones cortadas se comparten con los demás personajes iguales
+            if self.nombre in ("oso", "puma"):
+                self._cargar_animaciones(HOJAS_PERSONAJES[self.nombre])
         except Exception as e:
             print(f"Error al cargar sprites para {nombre}: {e}")
             self.imagen = GestorImagenes.crear_superficie_color((self.ancho, self.alto), color)
             self.imagen_original = self.imagen.copy()
             self.sprites = None
 
-        self.tiempo_ultimo_ataque = pygame.time.get_ticks()  # Añadir esta línea
+        self.tiempo_ultimo_ataque = reloj_juego.ahora()  # Añadir esta línea
         self.moviendo_x = False
         self.moviendo_y = False
         self.dx_actual = 0
         self.dy_actual = 0
         self.delay_entre_ataques = 200  # 200ms entre cada ataque
-        self.ultimo_ataque_normal = pygame.time.get_ticks()
+        self.ultimo_ataque_normal = reloj_juego.ahora()
         self.delay_entre_especiales = 1000  # 1000ms (1 segundo) entre ataques especiales
-        self.ultimo_ataque_especial = pygame.time.get_ticks()  # Nuevo atributo
+        self.ultimo_ataque_especial = reloj_juego.ahora()  # Nuevo atributo
 
-    def _cargar_frames(self, sprite_sheet, fila):
-        """
-        Carga los frames de una fila específica del sprite sheet
-        fila: 0 para idle, 1 para walk, 2 para attack
-        """
-        frames = []
-        # Cada sprite sheet tiene 4 columnas (frames) y 3 filas (tipos de animación)
-        frame_width = sprite_sheet.get_width() // 4
-        frame_height = sprite_sheet.get_height() // 3
-        
-        for columna in range(4):
-            # Crear superficie para el frame individual
-            frame = pygame.Surface((frame_width, frame_height), pygame.SRCALPHA)
-            # Copiar el área específica del sprite sheet
-            frame.blit(sprite_sheet, 
-                      (0, 0),  # Posición destino en el frame
-                      (columna * frame_width,  # X origen en sprite sheet
-                       fila * frame_height,    # Y origen en sprite sheet
-                       frame_width,            # Ancho del frame
-                       frame_height))          # Alto del frame
-            # Escalar al tamaño del personaje
-            frame = pygame.transform.scale(frame, (self.ancho, self.alto))
-            frames.append(frame)
-        return frames
+    def _cargar_animaciones(self, ruta):
+        """Toma las animaciones compartidas de la hoja, con las dos orientaciones ya preparadas"""
+        self.sprites, self.banco_frames = GestorAnimaciones.clips(ruta, (self.ancho, self.alto))
 
     def actualizar_animacion(self):
-        tiempo_actual = pygame.time.get_ticks()
-
-        # Manejo específico para cada personaje
-        if self.nombre == "oso":
-            # Estado de ataque para el oso
-            if self.estado_animacion == 'attack':
-                if tiempo_actual - self.tiempo_ultimo_frame > 250:  # Más tiempo para ver la animación
-                    self.frame_actual = (self.frame_actual + 1) % len(self.sprites[self.estado_animacion])
-                    self.tiempo_ultimo_frame = tiempo_actual
-                    # Mantener el ataque por más tiempo
-                    if self.frame_actual == len(self.sprites[self.estado_animacion]) - 1:
-                        # Esperar un poco más antes de cambiar
-                        if tiempo_actual - self.tiempo_ultimo_ataque > 500:  # 500ms de duración total
-                            if self.moviendo_x or self.moviendo_y:
-                                self.estado_animacion = 'walk'
-                            else:
-                                self.estado_animacion = 'idle'
-                            self.frame_actual = 0
-            else:
-                # Cambiar entre walk e idle según movimiento
-                if self.moviendo_x or self.moviendo_y:
-                    self.estado_animacion = 'walk'
-                else:
-                    self.estado_animacion = 'idle'
-                
-                if tiempo_actual - self.tiempo_ultimo_frame > self.delay_animacion:
-                    self.frame_actual = (self.frame_actual + 1) % len(self.sprites[self.estado_animacion])
-                    self.tiempo_ultimo_frame = tiempo_actual
-
-        elif self.nombre == "puma" or self.nombre == "puma2":
-            # Estado de ataque para los pumas
-            if self.estado_animacion == 'attack':
-                if tiempo_actual - self.tiempo_ultimo_frame > 100:
-                    self.frame_actual = (self.frame_actual + 1) % len(self.sprites[self.estado_animacion])
-                    self.tiempo_ultimo_frame = tiempo_actual
-                    # Cambiar a walk después de completar la animación
-                    if self.frame_actual == len(self.sprites[self.estado_animacion]) - 1:
-                        if self.moviendo_x or self.moviendo_y:
-                            self.estado_animacion = 'walk'
-                        else:
-                            self.estado_animacion = 'idle'
-                        self.frame_actual = 0
-            else:
-                # Actualizar estado según movimiento
-                nuevo_estado = 'idle'
-                if abs(self.dx_actual) > 0.1 or abs(self.dy_actual) > 0.1:
-                    nuevo_estado = 'walk'
-                    self.moviendo_x = True
-                    self.moviendo_y = True
-                else:
-                    self.moviendo_x = False
-                    self.moviendo_y = False
-
-                if self.estado_animacion != nuevo_estado:
-                    self.estado_animacion = nuevo_estado
-                    self.frame_actual = 0
-
-                if tiempo_actual - self.tiempo_ultimo_frame > self.delay_animacion:
-                    self.frame_actual = (self.frame_actual + 1) % len(self.sprites[self.estado_animacion])
-                    self.tiempo_ultimo_frame = tiempo_actual
+        """Avanza solo la animación de este personaje (ver actualizar_animaciones)"""
+        actualizar_animaciones((self,), reloj_juego.ahora())
 
     def mover_ia(self, rocas, jugador):
         """Sistema de movimiento para el villano"""
@@ -662,17 +1431,17 @@ class Personaje:
             # Inicializar variables de estado si no existen
             if not hasattr(self, 'estado_movimiento'):
                 self.estado_movimiento = 'perseguir'
-                self.tiempo_ultimo_cambio = pygame.time.get_ticks()
+                self.tiempo_ultimo_cambio = reloj_juego.ahora()
                 self.dx_actual = 0
                 self.dy_actual = 0
                 self.velocidad_actual = self.velocidad * 0.8
-                self.tiempo_ultimo_sprint = pygame.time.get_ticks()
+                self.tiempo_ultimo_sprint = reloj_juego.ahora()
                 self.duracion_sprint = 1000
                 self.cooldown_sprint = 3000
                 self.moviendo_x = False  # Añadir estos atributos
                 self.moviendo_y = False  # Añadir estos atributos
 
-            tiempo_actual = pygame.time.get_ticks()
+            tiempo_actual = reloj_juego.ahora()
 
             # Calcular distancia al jugador
             dx = jugador.x - self.x
@@ -703,7 +1472,7 @@ class Personaje:
                 # Estado: Movimiento semi-aleatorio
                 if tiempo_actual - self.tiempo_ultimo_cambio > 2000:
                     self.tiempo_ultimo_cambio = tiempo_actual
-                    angulo = random.uniform(0, 2 * math.pi)
+                    angulo = rng_juego.uniform(0, 2 * math.pi)
                     dx_objetivo = math.cos(angulo)
                     dy_objetivo = math.sin(angulo)
                 else:
@@ -719,7 +1488,7 @@ class Personaje:
             # 2. La distancia al jugador es óptima
             # 3. Ha pasado el tiempo de cooldown
             # 4. Tiene suficiente energía
-            if puede_sprint and self.energia > 20 and (self.evolucionado or random.random() < 0.3):
+            if puede_sprint and self.energia > 20 and (self.evolucionado or rng_juego.random() < 0.3):
                 if abs(distancia_al_jugador - distancia_optima_sprint) < 100:
                     self.sprint_activo = True
                     self.velocidad_actual = self.velocidad_base * (2 if self.evolucionado else 1.5)
@@ -812,7 +1581,7 @@ class Personaje:
         """Procesa la recepción de daño y activa la invulnerabilidad temporal"""
         if not self.invulnerable:
             sonido_golpe.play()
-            self.ultimo_golpe = pygame.time.get_ticks()
+            self.ultimo_golpe = reloj_juego.ahora()
             self.parpadeo = True
             self.invulnerable = True
 
@@ -827,7 +1596,7 @@ class Personaje:
         if self.nombre == "puma" and not self.evolucionado:
             self.evolucionado = True
             self.estado_evolucion = 'evolucionando'
-            self.tiempo_evolucion = pygame.time.get_ticks()
+            self.tiempo_evolucion = reloj_juego.ahora()
             self.vida_maxima *= 2  # Duplicar vida máxima
             self.vida = self.vida_maxima  # Establecer vida actual al nuevo máximo
             self.velocidad *= 1.3  # 30% más rápido
@@ -836,13 +1605,7 @@ class Personaje:
             
             # Cargar nuevos sprites para el puma evolucionado
             try:
-                sprite_sheet = pygame.image.load("images/puma2_sprites.png").convert_alpha()
-                # Primera fila (0): idle
-                self.sprites['idle'] = self._cargar_frames(sprite_sheet, 0)
-                # Segunda fila (1): walk
-                self.sprites['walk'] = self._cargar_frames(sprite_sheet, 1)
-                # Tercera fila (2): attack
-                self.sprites['attack'] = self._cargar_frames(sprite_sheet, 2)
+                self._cargar_animaciones(HOJAS_PERSONAJES["puma2"])
             except Exception as e:
                 print(f"Error al cargar sprites de evolución del puma: {e}")
                 # Si falla la carga de sprites, crear una versión más brillante del color actual
@@ -855,73 +1618,79 @@ class Personaje:
             
             self._imagen_cache = {}  # Resetear el caché de imágenes
     
-    def dibujar(self, pantalla):
-        tiempo_actual = pygame.time.get_ticks()
-        self.actualizar_estado(tiempo_actual)
-        self.actualizar_animacion()
+    def oculto(self):
+        """Durante el parpadeo de invulnerabilidad el sprite se oculta a intervalos"""
+        return self.parpadeo and (reloj_juego.ahora() // 100) % 2 == 0
 
-        if self.sprint_activo and self.nombre == "oso":
-            self._dibujar_estela_sprint(pantalla)
+    def imagen_actual(self):
+        """Frame de la animación actual (o la imagen de color si no hay sprites)"""
+        if self.sprites:
+            return self.banco_frames[(self.estado_animacion, self.mirando_derecha)][self.frame_actual]
+        if not hasattr(self, '_imagen_cache'):
+            self._imagen_cache = {}
         
-        if self.parpadeo and (tiempo_actual // 100) % 2 == 0:
-            return
+        clave = ('normal', self.mirando_derecha)
+        if clave not in self._imagen_cache:
+            if self.mirando_derecha:
+                self._imagen_cache[clave] = pygame.transform.flip(self.imagen, True, False)
+            else:
+                self._imagen_cache[clave] = self.imagen
+        return self._imagen_cache[clave]
+
+    def estela_actual(self):
+        """(superficie, x, y) de cada rastro de la estela del sprint"""
+        estela = []
+        if (self.sprint_activo and self.nombre == "oso" and
+                hasattr(self, 'posiciones_anteriores') and len(self.posiciones_anteriores) > 1):
+            total = len(self.posiciones_anteriores)
+            for i, (pos_x, pos_y) in enumerate(self.posiciones_anteriores[:-1]):
+                alpha = 100 * (i + 1) / total
+                # Color amarillo con transparencia
+                sprint_surface = GestorEfectos.rectangulo((self.ancho, self.alto), (255, 255, 0), alpha)
+                estela.append((sprint_surface, pos_x, pos_y))
+        return estela
+
+    def brillos_actuales(self):
+        """(superficie, x, y) de los brillos de evolución, que van bajo el sprite"""
+        tiempo_actual = reloj_juego.ahora()
+        brillos = []
 
         # Animación de evolución
         if self.estado_evolucion == 'evolucionando':
             tiempo_transcurrido = tiempo_actual - self.tiempo_evolucion
             if tiempo_transcurrido < 2000:
-                superficie_brillo = Surface((self.ancho + 40, self.alto + 40), SRCALPHA)
-                alpha = int(255 * (1 + math.sin(tiempo_transcurrido * 0.01)) / 2)
-                color_brillo = (255, 255, 200, alpha)
-                pygame.draw.circle(superficie_brillo, color_brillo, 
-                                 (self.ancho//2 + 20, self.alto//2 + 20), 
-                                 self.ancho//2 + 10)
-                pantalla.blit(superficie_brillo, (self.x - 20, self.y - 20))
+                alpha = 255 * (1 + math.sin(tiempo_transcurrido * 0.01)) / 2
+                superficie_brillo = GestorEfectos.brillo((self.ancho + 40, self.alto + 40),
+                                                         self.ancho//2 + 10, (255, 255, 200), alpha)
+                brillos.append((superficie_brillo, self.x - 20, self.y - 20))
             else:
                 self.estado_evolucion = 'evolucionado'
 
-        # Dibujar sprite actual
-        if self.sprites:
-            frame = self.sprites[self.estado_animacion][self.frame_actual]
-            if self.mirando_derecha:
-                frame = pygame.transform.flip(frame, True, False)
-            imagen_a_dibujar = frame
-        else:
-            if not hasattr(self, '_imagen_cache'):
-                self._imagen_cache = {}
-            
-            clave = ('normal', self.mirando_derecha)
-            if clave not in self._imagen_cache:
-                if self.mirando_derecha:
-                    self._imagen_cache[clave] = pygame.transform.flip(self.imagen, True, False)
-                else:
-                    self._imagen_cache[clave] = self.imagen
-            imagen_a_dibujar = self._imagen_cache[clave]
-        
         # Efecto de brillo para evolución
         if self.evolucionado and self.estado_evolucion == 'evolucionado':
             tiempo_transcurrido = tiempo_actual - self.tiempo_evolucion
-            alpha = int(50 * (1 + math.sin(tiempo_transcurrido * 0.005)) / 2)
-            superficie_brillo = Surface((self.ancho, self.alto), SRCALPHA)
-            color_brillo = (255, 255, 200, alpha)
-            pygame.draw.circle(superficie_brillo, color_brillo, 
-                             (self.ancho//2, self.alto//2), 
-                             self.ancho//2)
-            pantalla.blit(superficie_brillo, (self.x, self.y))
-        
-        pantalla.blit(imagen_a_dibujar, (self.x, self.y))
+            alpha = 50 * (1 + math.sin(tiempo_transcurrido * 0.005)) / 2
+            superficie_brillo = GestorEfectos.brillo((self.ancho, self.alto), self.ancho//2,
+                                                     (255, 255, 200), alpha)
+            brillos.append((superficie_brillo, self.x, self.y))
+        return brillos
 
-    def _dibujar_estela_sprint(self, pantalla):
-        """Método separado para dibujar la estela del sprint"""
-        if hasattr(self, 'posiciones_anteriores') and len(self.posiciones_anteriores) > 1:
-            for i, (pos_x, pos_y) in enumerate(self.posiciones_anteriores[:-1]):
-                alpha = int(100 * (i + 1) / len(self.posiciones_anteriores))
-                sprint_surface = Surface((self.ancho, self.alto), SRCALPHA)
-                sprint_surface.fill((255, 255, 0, alpha))  # Color amarillo con transparencia
-                pantalla.blit(sprint_surface, (pos_x, pos_y))
+    def dibujar(self, pantalla):
+        """Dibuja el personaje con sus efectos y devuelve el rect que ocupa lo dibujado"""
+        dibujado = [pantalla.blit(superficie, (x, y)) for superficie, x, y in self.estela_actual()]
+        if self.oculto():
+            return unir_rects(dibujado)
 
-    def dibujar_barra_vida(self, pantalla):
-        """Dibuja la barra de vida con cambio de colores"""
+        for superficie, x, y in self.brillos_actuales():
+            dibujado.append(pantalla.blit(superficie, (x, y)))
+        dibujado.append(pantalla.blit(self.imagen_actual(), (self.x, self.y)))
+        return unir_rects(dibujado)
+
+    def imagen_barra_vida(self):
+        """
+        Barras de vida, energía y ataques en una sola superficie, para dibujar
+        en posicion_barra_vida(). Solo se vuelve a pintar cuando cambia alguna barra.
+        """
         barra_ancho = 80
         barra_alto = 5
         vida_porcentaje = self.vida / self.vida_maxima
@@ -935,22 +1704,38 @@ class Personaje:
         else:
             color_barra = ROJO
 
-        # Barra de fondo
-        pygame.draw.rect(pantalla, GRIS, (self.x, self.y - 20, barra_ancho, barra_alto))
-        # Barra de vida actual
-        pygame.draw.rect(pantalla, color_barra, (self.x, self.y - 20, barra_actual, barra_alto))
-
-        # Barra de energía
         energia_porcentaje = self.energia / self.energia_maxima
         energia_actual = int(barra_ancho * energia_porcentaje)
-        pygame.draw.rect(pantalla, GRIS, (self.x, self.y - 15, barra_ancho, 3))
-        pygame.draw.rect(pantalla, AZUL, (self.x, self.y - 15, energia_actual, 3))
-
-        # Barra de ataques normales disponibles
         ataques_porcentaje = self.ataques_normales_disponibles / 5
         ataques_actual = int(barra_ancho * ataques_porcentaje)
-        pygame.draw.rect(pantalla, GRIS, (self.x, self.y - 10, barra_ancho, 3))
-        pygame.draw.rect(pantalla, (255, 165, 0), (self.x, self.y - 10, ataques_actual, 3))  # Color naranja
+
+        fila_vida, fila_energia, fila_ataques = self._filas_barras()
+        y_energia, y_ataques = fila_energia - fila_vida, fila_ataques - fila_vida
+        clave = (barra_actual, color_barra, energia_actual, ataques_actual, y_energia, y_ataques)
+        if getattr(self, '_barra_vida', (None,))[0] != clave:
+            superficie = Surface((barra_ancho, y_ataques + 3), SRCALPHA)
+            # Barra de fondo y barra de vida actual
+            pygame.draw.rect(superficie, GRIS, (0, 0, barra_ancho, barra_alto))
+            pygame.draw.rect(superficie, color_barra, (0, 0, barra_actual, barra_alto))
+            # Barra de energía
+            pygame.draw.rect(superficie, GRIS, (0, y_energia, barra_ancho, 3))
+            pygame.draw.rect(superficie, AZUL, (0, y_energia, energia_actual, 3))
+            # Barra de ataques normales disponibles
+            pygame.draw.rect(superficie, GRIS, (0, y_ataques, barra_ancho, 3))
+            pygame.draw.rect(superficie, (255, 165, 0), (0, y_ataques, ataques_actual, 3))  # Color naranja
+            self._barra_vida = (clave, superficie)
+        return self._barra_vida[1]
+
+    def _filas_barras(self):
+        """Fila de cada barra (vida, energía, ataques): y - 20, y - 15 e y - 10 truncadas como al dibujarlas sueltas"""
+        return int(self.y - 20), int(self.y - 15), int(self.y - 10)
+
+    def posicion_barra_vida(self):
+        return self.x, self._filas_barras()[0]
+
+    def dibujar_barra_vida(self, pantalla):
+        """Dibuja la barra de vida con cambio de colores"""
+        return pantalla.blit(self.imagen_barra_vida(), self.posicion_barra_vida())
 
     def actualizar_sprint(self, sprint_activado):
         if sprint_activado and self.energia > 0:
@@ -976,7 +1761,7 @@ class Personaje:
                 self.invulnerable = False
 
     def actualizar_ataques_normales(self):
-        tiempo_actual = pygame.time.get_ticks()
+        tiempo_actual = reloj_juego.ahora()
         tiempo_transcurrido = tiempo_actual - self.ultimo_tiempo_recarga
         
         if tiempo_transcurrido >= self.tiempo_recarga_ataques:
@@ -984,7 +1769,7 @@ class Personaje:
             self.ultimo_tiempo_recarga = tiempo_actual
 
     def atacar_normal(self):
-        tiempo_actual = pygame.time.get_ticks()
+        tiempo_actual = reloj_juego.ahora()
         if (self.ataques_normales_disponibles > 0 and 
             tiempo_actual - self.ultimo_ataque_normal >= self.delay_entre_ataques):
             self.ataques_normales_disponibles -= 1
@@ -992,30 +1777,363 @@ class Personaje:
             return True
         return False
 
-    def dibujar_barra_ataques(self, pantalla):
+    def imagen_barra_ataques(self):
+        """Barra de recarga de los ataques normales (para dibujar en (x, y - 30)), o None si está llena"""
         if self.ataques_normales_disponibles < 3:
-            tiempo_actual = pygame.time.get_ticks()
+            tiempo_actual = reloj_juego.ahora()
             tiempo_transcurrido = tiempo_actual - self.ultimo_tiempo_recarga
             porcentaje = min(tiempo_transcurrido / self.tiempo_recarga_ataques, 1.0)
             
             # Dibuja la barra de recarga
             ancho_barra = 100
             alto_barra = 10
-            x = self.x  # Cambiado de self.rect.x
-            y = self.y - 30  # Cambiado de self.rect.y
-            
-            pygame.draw.rect(pantalla, (50, 50, 50), (x, y, ancho_barra, alto_barra))
-            pygame.draw.rect(pantalla, (200, 200, 0), (x, y, ancho_barra * porcentaje, alto_barra))
+            relleno = int(ancho_barra * porcentaje)
+            if relleno not in cache_barras_recarga:
+                superficie = Surface((ancho_barra, alto_barra))
+                superficie.fill((50, 50, 50))
+                pygame.draw.rect(superficie, (200, 200, 0), (0, 0, relleno, alto_barra))
+                cache_barras_recarga[relleno] = superficie
+            return cache_barras_recarga[relleno]
+        return None
+
+    def dibujar_barra_ataques(self, pantalla):
+        imagen = self.imagen_barra_ataques()
+        if imagen is None:
+            return None
+        return pantalla.blit(imagen, (self.x, self.y - 30))
 
     def puede_atacar_especial(self):
         """Verifica si puede realizar un ataque especial"""
-        tiempo_actual = pygame.time.get_ticks()
+        tiempo_actual = reloj_juego.ahora()
         if tiempo_actual - self.ultimo_ataque_especial >= self.delay_entre_especiales:
             self.ultimo_ataque_especial = tiempo_actual
             return True
         return False
 
+# ============= MÁQUINA DE ESTADOS DE ANIMACIÓN =============
+MOVIMIENTO = 'movimiento'  # transición a 'walk' o 'idle' según se mueva el personaje
+
+class Clip:
+    """Una animación de la hoja: cuánto dura cada frame y qué pasa al llegar al último"""
+    __slots__ = ('duracion_frame', 'siguiente', 'duracion_minima')
+
+    def __init__(self, duracion_frame, siguiente=None, duracion_minima=None):
+        self.duracion_frame = duracion_frame  # ms que se muestra cada frame
+        # None: se repite sin fin. Si no, estado al que pasa al mostrar el último frame
+        self.siguiente = siguiente
+        # ms desde el último ataque antes de poder salir; mientras tanto se repite
+        self.duracion_minima = duracion_minima
+
+class AnimacionPersonaje:
+    """Tabla de clips de un personaje y cómo decide si se está moviendo"""
+    __slots__ = ('clips', 'umbral_movimiento', 'reiniciar_al_cambiar')
+
+    def __init__(self, clips, umbral_movimiento=None, reiniciar_al_cambiar=False):
+        self.clips = clips
+        # None: usa moviendo_x/moviendo_y tal cual. Un número: los calcula a partir
+        # de dx_actual/dy_actual (la IA del puma no los deja al día)
+        self.umbral_movimiento = umbral_movimiento
+        # Si al pasar de 'idle' a 'walk' (o al revés) la animación empieza desde el principio
+        self.reiniciar_al_cambiar = reiniciar_al_cambiar
+
+# Los estados de movimiento ('idle' y 'walk') se eligen en cada tick según el
+# movimiento; 'attack' lo activa quien ataca y sale solo al terminar
+_ANIMACION_PUMA = AnimacionPersonaje({
+    'idle': Clip(150),
+    'walk': Clip(150),
+    'attack': Clip(100, siguiente=MOVIMIENTO),
+}, umbral_movimiento=0.1, reiniciar_al_cambiar=True)
+
+ANIMACIONES = {
+    "oso": AnimacionPersonaje({
+        'idle': Clip(150),
+        'walk': Clip(150),
+        # Más lento, y visible al menos 500 ms
+        'attack': Clip(250, siguiente=MOVIMIENTO, duracion_minima=500),
+    }),
+    "puma": _ANIMACION_PUMA,
+    "puma2": _ANIMACION_PUMA,
+}
+
+def _estado_movimiento(personaje, umbral):
+    if umbral is not None:
+        moviendo = abs(personaje.dx_actual) > umbral or abs(personaje.dy_actual) > umbral
+        personaje.moviendo_x = personaje.moviendo_y = moviendo
+    return 'walk' if personaje.moviendo_x or personaje.moviendo_y else 'idle'
+
+def actualizar_animaciones(personajes, tiempo_actual):
+    """
+    Avanza de una pasada la animación de todos los personajes con el mismo
+    instante. Todo lo que cambia entre personajes sale de ANIMACIONES.
+    """
+    ultimo_frame = FRAMES_POR_CLIP - 1
+    for personaje in personajes:
+        animacion = ANIMACIONES.get(personaje.nombre)
+        if animacion is None:
+            continue
+        clip = animacion.clips[personaje.estado_animacion]
+
+        if clip.siguiente is None:
+            estado = _estado_movimiento(personaje, animacion.umbral_movimiento)
+            if estado != personaje.estado_animacion:
+                personaje.estado_animacion = estado
+                if animacion.reiniciar_al_cambiar:
+                    personaje.frame_actual = 0
+                clip = animacion.clips[estado]
+
+        if tiempo_actual - personaje.tiempo_ultimo_frame <= clip.duracion_frame:
+            continue
+        personaje.frame_actual = (personaje.frame_actual + 1) % FRAMES_POR_CLIP
+        personaje.tiempo_ultimo_frame = tiempo_actual
+
+        if (clip.siguiente is not None and personaje.frame_actual == ultimo_frame
+                and (clip.duracion_minima is None
+                     or tiempo_actual - personaje.tiempo_ultimo_ataque > clip.duracion_minima)):
+            if clip.siguiente == MOVIMIENTO:
+                personaje.estado_animacion = 'walk' if personaje.moviendo_x or personaje.moviendo_y else 'idle'
+            else:
+                personaje.estado_animacion = clip.siguiente
+            personaje.frame_actual = 0
+
+# ============= DIBUJO POR RECTÁNGULOS SUCIOS =============
+DIBUJO_SUCIO = True  # False: cada frame se pinta el fondo entero y se hace flip
+
+class RenderizadorSucio:
+    """
+    Dibujo por rectángulos sucios. En lugar de pintar el fondo completo y hacer
+    flip, cada frame repone el fondo solo bajo lo que se dibujó en el frame
+    anterior, se dibuja encima todo lo visible y se envían a la pantalla
+    únicamente los rectángulos de ambos frames con pygame.display.update.
+    El primer frame de cada pantalla (tras `invalidar`) se pinta y envía entero.
+    """
+    def __init__(self, activo=DIBUJO_SUCIO):
+        self.activo = activo
+        self.completo = True
+        self.anteriores = []  # rects dibujados en el frame anterior
+        self.actuales = []
+        self.rects_enviados = 0  # del último frame, para el perfilador
+
+    def invalidar(self):
+        """El próximo frame se dibuja entero (al cambiar de pantalla o si algo tapa todo)"""
+        self.completo = True
+
+    def restaurar_fondo(self, pantalla, imagen_fondo, color=BLANCO):
+        """Repone el fondo entero o solo bajo los rects del frame anterior"""
+        if self.completo or not self.activo:
+            if imagen_fondo:
+                pantalla.blit(imagen_fondo, (0, 0))
+            else:
+                pantalla.fill(color)
+            return
+        for rect in self.anteriores:
+            if imagen_fondo:
+                pantalla.blit(imagen_fondo, rect, rect)
+            else:
+                pantalla.fill(color, rect)
+
+    def marcar(self, *rects):
+        """Anota lo dibujado en este frame; acepta Rects, listas de Rects y None"""
+        for rect in rects:
+            if isinstance(rect, list):
+                self.actuales.extend(r for r in rect if r)
+            elif rect:
+                self.actuales.append(rect)
+
+    def presentar(self):
+        """Envía el frame a la pantalla"""
+        if self.completo or not self.activo:
+            pygame.display.flip()
+            self.rects_enviados = 1
+        else:
+            rects = self.anteriores + self.actuales
+            pygame.display.update(rects)
+            self.rects_enviados = len(rects)
+        self.anteriores, self.actuales = self.actuales, []
+        self.completo = False
+
+renderizador = RenderizadorSucio()
+
+# ============= ESCENA DE LA PARTIDA CON SPRITES =============
+# Capas de dibujo, de abajo arriba. Cada personaje usa tres capas seguidas
+# (estela, brillo, cuerpo) para conservar el orden oso -> puma
+CAPA_ROCAS = 0
+CAPA_ITEMS_VIDA = 1
+CAPA_ITEMS_ENERGIA = 2
+CAPA_ATAQUES_JUGADOR = 3
+CAPA_ATAQUES_ENEMIGO = 4
+CAPA_PERSONAJES = 5
+CAPA_BARRAS = CAPA_PERSONAJES + 6
+# Con más proyectiles que estos casi toda la pantalla cambia cada frame: seguir
+# un sprite por proyectil cuesta más de lo que ahorran los rectángulos sucios
+UMBRAL_DIBUJO_LOTE = 200
+
+class SpriteEntidad(pygame.sprite.DirtySprite):
+    """
+    Sprite que muestra la imagen actual de una entidad en su posición.
+    Solo se marca sucio cuando cambia la imagen, la posición o la visibilidad.
+    """
+    def __init__(self, capa):
+        super().__init__()
+        self._layer = capa
+        self.image = None
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.visible = 0
+
+    def mostrar(self, imagen, x, y):
+        posicion = (int(x), int(y))
+        if imagen is not self.image or posicion != self.rect.topleft or not self.visible:
+            self.image = imagen
+            self.rect = imagen.get_rect(topleft=posicion)
+            self.visible = 1
+            self.dirty = 1
+
+    def ocultar(self):
+        if self.visible:
+            self.visible = 0
+
+class EscenaPartida:
+    """
+    Dibuja la partida con un pygame.sprite.LayeredDirty. Cada frame se copian
+    imagen y posición de las entidades a sus sprites (el k-ésimo de cada lista
+    al k-ésimo sprite de su capa) y el grupo repinta por capas solo lo que ha
+    cambiado, devolviendo esos rects para pygame.display.update.
+    Con más de UMBRAL_DIBUJO_LOTE proyectiles el frame se pinta entero, cada
+    tipo de entidad en una pasada y los proyectiles en un solo blits, y se
+    envía completo.
+    Tiene la misma interfaz que RenderizadorSucio (invalidar, marcar, presentar).
+    """
+    def __init__(self, activo=DIBUJO_SUCIO):
+        self.activo = activo
+        self.grupo = pygame.sprite.LayeredDirty()
+        self.sprites = {}  # capa -> lista de SpriteEntidad en orden de dibujo
+        self.completo = True
+        self.en_lote = False  # el último frame se pintó sin el grupo
+        self.rects = []  # devueltos por el grupo en el último dibujo
+        self.superpuestos = []  # dibujados encima del grupo en este frame (overlays)
+        self.superpuestos_anteriores = []
+        self.conteo = {'sprites': 0, 'visibles': 0, 'sucios': 0, 'rects': 0}
+        self._fondo_liso = None
+
+    def invalidar(self):
+        """El próximo frame se repinta y envía entero"""
+        self.completo = True
+
+    def marcar(self, *rects):
+        """Anota rects dibujados encima de la escena: se envían ahora y se repintan en el siguiente frame"""
+        for rect in rects:
+            if rect:
+                self.superpuestos.append(rect)
+
+    def _mostrar(self, capa, elementos):
+        """Asigna cada (imagen, x, y) a un sprite de la capa y oculta los sobrantes"""
+        sprites = self.sprites.setdefault(capa, [])
+        n = 0
+        for imagen, x, y in elementos:
+            if n == len(sprites):
+                sprite = SpriteEntidad(capa)
+                sprites.append(sprite)
+                self.grupo.add(sprite)
+            sprites[n].mostrar(imagen, x, y)
+            n += 1
+        for sprite in sprites[n:]:
+            sprite.ocultar()
+
+    def _fondo(self, pantalla):
+        fondo = fondo_juego()
+        if fondo:
+            return fondo
+        if self._fondo_liso is None or self._fondo_liso.get_size() != pantalla.get_size():
+            self._fondo_liso = Surface(pantalla.get_size())
+            self._fondo_liso.fill(BLANCO)
+        return self._fondo_liso
+
+    def dibujar(self, pantalla, estado, alpha=1.0):
+        if estado.proyectiles.cantidad() > UMBRAL_DIBUJO_LOTE:
+            # Lo que hay en pantalla ya no es lo que cree el grupo: al volver a
+            # los sprites se repinta todo
+            self.en_lote = self.completo = True
+            self.rects = _dibujar_entidades(pantalla, estado, alpha)
+            return self.rects
+        if self.en_lote:
+            self.en_lote = False
+            self.completo = True
+
+        jugador, enemigo = estado.jugador, estado.enemigo
+        with perfilador.medir('dibujo_rocas'):
+            self._mostrar(CAPA_ROCAS, ((roca.imagen_actual(), roca.x, roca.y) for roca in estado.rocas))
+
+        with perfilador.medir('dibujo_items'):
+            self._mostrar(CAPA_ITEMS_VIDA, ((item.imagen_actual(), item.x, item.y) for item in estado.items_vida))
+            self._mostrar(CAPA_ITEMS_ENERGIA,
+                          ((item.imagen_actual(), item.x, item.y) for item in estado.items_energia))
+
+        with perfilador.medir('dibujo_ataques'):
+            self._mostrar(CAPA_ATAQUES_JUGADOR, estado.proyectiles.elementos_dibujo(DUEÑO_JUGADOR, alpha))
+            self._mostrar(CAPA_ATAQUES_ENEMIGO, estado.proyectiles.elementos_dibujo(DUEÑO_ENEMIGO, alpha))
+
+        with perfilador.medir('dibujo_personajes'):
+            for i, personaje in enumerate((jugador, enemigo)):
+                capa = CAPA_PERSONAJES + 3 * i
+                self._mostrar(capa, personaje.estela_actual())
+                if personaje.oculto():
+                    self._mostrar(capa + 1, ())
+                    self._mostrar(capa + 2, ())
+                else:
+                    self._mostrar(capa + 1, personaje.brillos_actuales())
+                    self._mostrar(capa + 2, ((personaje.imagen_actual(), personaje.x, personaje.y),))
+
+        with perfilador.medir('dibujo_barras'):
+            barras = [(jugador.imagen_barra_vida(), *jugador.posicion_barra_vida()),
+                      (enemigo.imagen_barra_vida(), *enemigo.posicion_barra_vida())]
+            if jugador.ataques_normales_disponibles < jugador.ataques_normales_maximos:
+                barra_ataques = jugador.imagen_barra_ataques()
+                if barra_ataques is not None:
+                    barras.append((barra_ataques, jugador.x, jugador.y - 30))
+            self._mostrar(CAPA_BARRAS, barras)
+
+        with perfilador.medir('dibujo_sprites'):
+            sprites = self.grupo.sprites()
+            self.conteo['sprites'] = len(sprites)
+            self.conteo['visibles'] = sum(1 for sprite in sprites if sprite.visible)
+            self.conteo['sucios'] = sum(1 for sprite in sprites if sprite.dirty)
+            if self.completo or not self.activo:
+                self.grupo.repaint_rect(pantalla.get_rect())
+            for rect in self.superpuestos_anteriores:
+                self.grupo.repaint_rect(rect)
+            self.rects = self.grupo.draw(pantalla, self._fondo(pantalla))
+            self.conteo['rects'] = len(self.rects)
+        return self.rects
+
+    def presentar(self):
+        """Envía a la pantalla lo que ha cambiado (o todo, tras invalidar)"""
+        if self.completo or not self.activo:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.rects + self.superpuestos)
+        self.superpuestos_anteriores, self.superpuestos = self.superpuestos, []
+        self.completo = False
+
+    def estadisticas(self):
+        """Sprites en el grupo, visibles, repintados y rects enviados en el último frame"""
+        return dict(self.conteo)
+
 # ============= BUCLE PRINCIPAL DEL JUEGO =============
+def dibujar_carga(pantalla, progreso):
+    """Pantalla de carga: solo un texto y una barra, sin imágenes que esperar"""
+    pygame.event.pump()  # que la ventana siga respondiendo mientras se carga
+    pantalla.fill(MARRON_OSCURO)
+    texto = GestorTextos.render(FUENTE_NORMAL, "Cargando...", CREMA)
+    pantalla.blit(texto, texto.get_rect(center=(ANCHO//2, ALTO//2 - 40)))
+    
+    barra = pygame.Rect(0, 0, 400, 24)
+    barra.center = (ANCHO//2, ALTO//2)
+    relleno = barra.inflate(-8, -8)
+    relleno.width = int(relleno.width * progreso)
+    pygame.draw.rect(pantalla, DORADO, barra, 3, border_radius=6)
+    if relleno.width > 0:
+        pygame.draw.rect(pantalla, DORADO_CLARO, relleno)
+    pygame.display.flip()
+
 def dibujar_boton(pantalla, texto, x, y, ancho, alto, mouse_pos):
     """Dibuja un botón con estilo medieval"""
     rect = pygame.Rect(x, y, ancho, alto)
@@ -1038,11 +2156,11 @@ def dibujar_boton(pantalla, texto, x, y, ancho, alto, mouse_pos):
         pygame.draw.circle(pantalla, DORADO_CLARO, (x + ancho - 10, y + alto - 10), 3)
     
     # Texto del botón con sombra
-    texto_surface = FUENTE_BOTONES.render(texto, True, MARRON_OSCURO if hover else DORADO_CLARO)
+    texto_surface = GestorTextos.render(FUENTE_BOTONES, texto, MARRON_OSCURO if hover else DORADO_CLARO)
     texto_rect = texto_surface.get_rect(center=rect.center)
     
     # Dibujar sombra del texto
-    sombra_surface = FUENTE_BOTONES.render(texto, True, MARRON_OSCURO)
+    sombra_surface = GestorTextos.render(FUENTE_BOTONES, texto, MARRON_OSCURO)
     sombra_rect = sombra_surface.get_rect(center=(texto_rect.centerx + 2, texto_rect.centery + 2))
     pantalla.blit(sombra_surface, sombra_rect)
     
@@ -1051,7 +2169,58 @@ def dibujar_boton(pantalla, texto, x, y, ancho, alto, mouse_pos):
     
     return rect
 
-def menu_instrucciones(pantalla):
+def renderizar_documento(lineas, ancho):
+    """
+    Renderiza un documento de texto completo en una superficie alta.
+    Las líneas que terminan en ":" son títulos con sombra, las vacías dejan
+    un hueco. Los títulos brillan, así que en la superficie solo va su
+    sombra: el texto se dibuja encima en cada frame con dibujar_titulos.
+    Devuelve la superficie, la altura del contenido y los títulos como
+    (línea, rect dentro del documento).
+    """
+    altura_total = 0
+    for linea in lineas:
+        if linea.endswith(":"):  # Títulos
+            altura_total += 50
+        elif linea:  # Texto normal
+            altura_total += 35
+        else:  # Línea en blanco
+            altura_total += 20
+    
+    # Un poco de margen por si la última línea es más alta que su hueco
+    documento = pygame.Surface((ancho, altura_total + 50), pygame.SRCALPHA)
+    titulos = []
+    y = 0
+    for linea in lineas:
+        if linea.endswith(":"):
+            sombra = GestorTextos.render(FUENTE_BOTONES, linea, MARRON_OSCURO)
+            rect = sombra.get_rect(centerx=ancho // 2, y=y)
+            documento.blit(sombra, (rect.x + 2, rect.y + 2))
+            titulos.append((linea, rect))
+            y += 50
+        elif linea:
+            texto = GestorTextos.render(FUENTE_NORMAL, linea, CREMA)
+            documento.blit(texto, texto.get_rect(centerx=ancho // 2, y=y))
+            y += 35
+        else:
+            y += 20
+    return documento, altura_total, titulos
+
+def dibujar_titulos(pantalla, titulos, color, origen, ventana):
+    """
+    Dibuja los títulos de un documento con su color actual. `ventana` es la
+    parte visible del documento y `origen` dónde empieza en pantalla; los
+    títulos se recortan a ella igual que el resto del documento.
+    """
+    recorte_anterior = pantalla.get_clip()
+    pantalla.set_clip(pygame.Rect(origen, ventana.size).clip(recorte_anterior))
+    for linea, rect in titulos:
+        if rect.colliderect(ventana):
+            texto = GestorTextos.render(FUENTE_BOTONES, linea, color)
+            pantalla.blit(texto, (origen[0] + rect.x - ventana.x, origen[1] + rect.y - ventana.y))
+    pantalla.set_clip(recorte_anterior)
+
+async def menu_instrucciones(pantalla):
     """Muestra el menú de instrucciones con estilo medieval y scroll"""
     instrucciones = [
         "",
@@ -1077,31 +2246,24 @@ def menu_instrucciones(pantalla):
       
     ]
     
-    try:
-        fondo_menu = pygame.image.load("images/fondo_menu.png")
-        fondo_menu = pygame.transform.scale(fondo_menu, (ANCHO, ALTO))
-    except:
-        fondo_menu = None
+    fondo_menu = GestorImagenes.cargar_imagen("images/fondo_menu.png", (ANCHO, ALTO),
+                                              alpha=False, fallback=lambda: None)
     
     corriendo = True
     tiempo_inicial = pygame.time.get_ticks()
     scroll_y = 0  # Posición inicial del scroll en 0 para que comience arriba
     velocidad_scroll = 30  # Velocidad del scroll
     
-    # Calcular altura total del contenido
-    altura_total = 0
-    for linea in instrucciones:
-        if linea.endswith(":"):  # Títulos
-            altura_total += 50
-        elif linea:  # Texto normal
-            altura_total += 35
-        else:  # Línea en blanco
-            altura_total += 20
-    
     # Área visible del contenido
     margen = 50
+    ancho_visible = ANCHO - 2 * margen
     area_visible = ALTO - 2 * margen
+    
+    # El documento entero se renderiza una sola vez en una superficie alta;
+    # los títulos, que brillan, se dibujan encima en cada frame
+    documento, altura_total, titulos = renderizar_documento(instrucciones, ancho_visible)
     max_scroll = max(0, altura_total - area_visible)
+    renderizador.invalidar()
     
     while corriendo:
         tiempo_actual = pygame.time.get_ticks()
@@ -1116,64 +2278,35 @@ def menu_instrucciones(pantalla):
                 # Actualizar scroll con la rueda del ratón
                 scroll_y = max(min(scroll_y - evento.y * velocidad_scroll, max_scroll), 0)
         
+        # Efecto de brillo para títulos
+        color_titulo = GestorTextos.color_brillo(DORADO_CLARO, tiempo_actual - tiempo_inicial)
+        
         # Dibujar fondo
-        if fondo_menu:
-            pantalla.blit(fondo_menu, (0, 0))
-        else:
-            pantalla.fill(MARRON_OSCURO)
+        renderizador.restaurar_fondo(pantalla, fondo_menu, MARRON_OSCURO)
         
         # Dibujar marco decorativo
-        pygame.draw.rect(pantalla, MARRON_CLARO, 
+        rect_marco = pygame.draw.rect(pantalla, MARRON_CLARO, 
                         (margen, margen, ANCHO - 2*margen, ALTO - 2*margen), 
                         border_radius=15)
         pygame.draw.rect(pantalla, DORADO, 
                         (margen, margen, ANCHO - 2*margen, ALTO - 2*margen), 
                         4, border_radius=15)
         
-        # Crear superficie para clipear el contenido
-        superficie_contenido = pygame.Surface((ANCHO - 2*margen, ALTO - 2*margen), pygame.SRCALPHA)
-        
-        # Dibujar texto con efectos en la superficie de contenido
-        y = -scroll_y  # Comenzar desde la posición de scroll
-        for linea in instrucciones:
-            if linea.endswith(":"):  # Títulos
-                # Efecto de brillo para títulos
-                brillo = abs(math.sin((tiempo_actual - tiempo_inicial) * 0.002)) * 50
-                color_titulo = (
-                    min(255, DORADO_CLARO[0] + brillo),
-                    min(255, DORADO_CLARO[1] + brillo),
-                    min(255, DORADO_CLARO[2] + brillo)
-                )
-                texto = FUENTE_BOTONES.render(linea, True, color_titulo)
-                sombra = FUENTE_BOTONES.render(linea, True, MARRON_OSCURO)
-                rect = texto.get_rect(centerx=(ANCHO - 2*margen)//2, y=y)
-                # Dibujar sombra y texto
-                superficie_contenido.blit(sombra, (rect.x + 2, rect.y + 2))
-                superficie_contenido.blit(texto, rect)
-                y += 50
-            elif linea:  # Texto normal
-                texto = FUENTE_NORMAL.render(linea, True, CREMA)
-                rect = texto.get_rect(centerx=(ANCHO - 2*margen)//2, y=y)
-                superficie_contenido.blit(texto, rect)
-                y += 35
-            else:  # Línea en blanco
-                y += 20
+        # Mostrar solo la ventana del documento que corresponde al scroll
+        ventana = pygame.Rect(0, scroll_y, ancho_visible, area_visible)
+        pantalla.blit(documento, (margen, margen), ventana)
+        dibujar_titulos(pantalla, titulos, color_titulo, (margen, margen), ventana)
         
-        # Dibujar la superficie de contenido en la pantalla
-        pantalla.blit(superficie_contenido, (margen, margen))
-        
-        pygame.display.flip()
+        renderizador.marcar(rect_marco)
+        renderizador.presentar()
+        await asyncio.sleep(0)
     
     return True
 
-def menu_principal(pantalla):
+async def menu_principal(pantalla):
     """Muestra el menú principal con estilo medieval"""
-    try:
-        fondo_menu = pygame.image.load("images/fondo_menu.png")
-        fondo_menu = pygame.transform.scale(fondo_menu, (ANCHO, ALTO))
-    except:
-        print("⚠️ No se pudo cargar fondo_menu.png")
-        fondo_menu = None
+    fondo_menu = GestorImagenes.cargar_imagen("images/fondo_menu.png", (ANCHO, ALTO),
+                                              alpha=False, fallback=lambda: None)
     
     ancho_boton = 250
     alto_boton = 60
@@ -1202,9 +2335,10 @@ def menu_principal(pantalla):
         alto_boton
     )
     
-    texto_titulo = FUENTE_TITULO.render("El Páramo", True, DORADO_CLARO)
-    sombra_titulo = FUENTE_TITULO.render("El Páramo", True, MARRON_OSCURO)
+    texto_titulo = GestorTextos.render(FUENTE_TITULO, "El Páramo", DORADO_CLARO)
+    sombra_titulo = GestorTextos.render(FUENTE_TITULO, "El Páramo", MARRON_OSCURO)
     rect_titulo = texto_titulo.get_rect(center=(ANCHO//2, 120))
+    renderizador.invalidar()
     
     corriendo = True
     while corriendo:
@@ -1221,41 +2355,36 @@ def menu_principal(pantalla):
                 if boton_jugar.collidepoint(mouse_pos):
                     return "jugar"
                 elif boton_instrucciones.collidepoint(mouse_pos):
-                    if menu_instrucciones(pantalla):
+                    if await menu_instrucciones(pantalla):
+                        renderizador.invalidar()
                         continue
                     return "salir"
                 elif boton_salir.collidepoint(mouse_pos):
                     return "salir"
         
         # Dibujar el fondo
-        if fondo_menu:
-            pantalla.blit(fondo_menu, (0, 0))
-        else:
-            pantalla.fill(MARRON_OSCURO)
+        renderizador.restaurar_fondo(pantalla, fondo_menu, MARRON_OSCURO)
         
         # Efecto de brillo para el título
-        brillo = abs(math.sin(tiempo * 0.002)) * 50
-        color_titulo = (
-            min(255, DORADO_CLARO[0] + brillo),
-            min(255, DORADO_CLARO[1] + brillo),
-            min(255, DORADO_CLARO[2] + brillo)
-        )
-        texto_titulo_brillante = FUENTE_TITULO.render("El Páramo", True, color_titulo)
+        color_titulo = GestorTextos.color_brillo(DORADO_CLARO, tiempo)
+        texto_titulo_brillante = GestorTextos.render(FUENTE_TITULO, "El Páramo", color_titulo)
         
         # Dibujar título
-        pantalla.blit(sombra_titulo, (rect_titulo.x + 4, rect_titulo.y + 4))
-        pantalla.blit(texto_titulo_brillante, rect_titulo)
+        renderizador.marcar(pantalla.blit(sombra_titulo, (rect_titulo.x + 4, rect_titulo.y + 4)),
+                            pantalla.blit(texto_titulo_brillante, rect_titulo))
         
         # Dibujar botones
-        dibujar_boton(pantalla, "Jugar", boton_jugar.x, boton_jugar.y, ancho_boton, alto_boton, mouse_pos)
-        dibujar_boton(pantalla, "Instrucciones", boton_instrucciones.x, boton_instrucciones.y, ancho_boton, alto_boton, mouse_pos)
-        dibujar_boton(pantalla, "Salir", boton_salir.x, boton_salir.y, ancho_boton, alto_boton, mouse_pos)
+        renderizador.marcar(
+            dibujar_boton(pantalla, "Jugar", boton_jugar.x, boton_jugar.y, ancho_boton, alto_boton, mouse_pos),
+            dibujar_boton(pantalla, "Instrucciones", boton_instrucciones.x, boton_instrucciones.y, ancho_boton, alto_boton, mouse_pos),
+            dibujar_boton(pantalla, "Salir", boton_salir.x, boton_salir.y, ancho_boton, alto_boton, mouse_pos))
         
-        pygame.display.flip()
+        renderizador.presentar()
+        await asyncio.sleep(0)
     
     return "salir"
 
-def reproducir_cinematica(pantalla):
+async def reproducir_cinematica(pantalla):
     """Reproduce una cinemática corta del puma entrando en escena"""
     # Crear los personajes
     oso = Personaje("oso", 200, 300)
@@ -1272,6 +2401,7 @@ def reproducir_cinematica(pantalla):
     
     # Duración total de la cinemática: 3 segundos
     tiempo_inicio = pygame.time.get_ticks()
+    renderizador.invalidar()
     duracion = 3000
     
     # Posición final del puma
@@ -1290,25 +2420,21 @@ def reproducir_cinematica(pantalla):
         puma.x = (ANCHO + 100) - (distancia_total * progreso)
         
         # Actualizar animación usando el método de la clase
-        puma.actualizar_animacion()
-        oso.actualizar_animacion()
+        actualizar_animaciones((puma, oso), reloj_juego.ahora())
         
         # Renderizar la escena
-        if fondo:
-            pantalla.blit(fondo, (0, 0))
-        else:
-            pantalla.fill(BLANCO)
+        renderizador.restaurar_fondo(pantalla, fondo_juego())
             
         # Dibujar sombras
-        dibujar_sombra(pantalla, oso.x, oso.y, oso.ancho, oso.alto)
-        dibujar_sombra(pantalla, puma.x, puma.y, puma.ancho, puma.alto)
+        renderizador.marcar(dibujar_sombra(pantalla, oso.x, oso.y, oso.ancho, oso.alto),
+                            dibujar_sombra(pantalla, puma.x, puma.y, puma.ancho, puma.alto))
         
         # Dibujar personajes
-        oso.dibujar(pantalla)
-        puma.dibujar(pantalla)
+        renderizador.marcar(oso.dibujar(pantalla), puma.dibujar(pantalla))
         
-        pygame.display.flip()
+        renderizador.presentar()
         reloj.tick(60)
+        await asyncio.sleep(0)
 
 def obtener_direccion(dx, dy):
     """Determina la dirección del ataque basado en el vector (dx, dy)"""
@@ -1332,369 +2458,992 @@ def obtener_direccion(dx, dy):
     else:  # -67.5 < grados <= -22.5
         return "arriba-derecha"
 
-async def main():
-    pygame.init()
-    pantalla = pygame.display.set_mode((ANCHO, ALTO))
-    pygame.display.set_caption(TITULO)
-    
-    while True:
-        opcion = menu_principal(pantalla)
-        if opcion == "jugar":
-            reproducir_cinematica(pantalla)
+# ============= INSTRUMENTACIÓN =============
+FRAMES_PERFILADOR = 600  # frames que se guardan para percentiles, gráfica y volcado
+OBJETIVO_FRAME_MS = 1000 / FPS
+
+class _MedicionNula:
+    """Medición que no hace nada, para cuando el perfilador está apagado"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+class _Medicion:
+    __slots__ = ('perfilador', 'fase', 'inicio')
+
+    def __init__(self, perfilador, fase):
+        self.perfilador = perfilador
+        self.fase = fase
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.perfilador.registrar(self.fase, (time.perf_counter() - self.inicio) * 1000)
+        return False
+
+class Perfilador:
+    """
+    Mide cuánto tarda cada fase del bucle del juego (en ms) y lo muestra
+    como overlay con percentiles y una gráfica del tiempo por frame.
+    Apagado no cuesta más que una llamada por fase.
+    """
+    def __init__(self, ventana=FRAMES_PERFILADOR):
+        self.activo = False
+        self.historial = deque(maxlen=ventana)  # un dict {fase: ms} por frame
+        self.frame_actual = {}
+        self.inicio_frame = None
+        self._nula = _MedicionNula()
+        self._fuente = None
+        self._texto = None
+        self._frames_desde_texto = 0
+
+    def alternar(self):
+        self.activo = not self.activo
+        self.frame_actual = {}
+        self.inicio_frame = None
+
+    def medir(self, fase):
+        """Uso: `with perfilador.medir('fase'): ...`. Varias mediciones de una fase en un frame se suman"""
+        return _Medicion(self, fase) if self.activo else self._nula
+
+    def registrar(self, fase, ms):
+        self.frame_actual[fase] = self.frame_actual.get(fase, 0) + ms
+
+    def empezar_frame(self):
+        if self.activo:
+            self.inicio_frame = time.perf_counter()
+
+    def terminar_frame(self):
+        if self.activo and self.inicio_frame is not None:
+            self.frame_actual['frame'] = (time.perf_counter() - self.inicio_frame) * 1000
+            self.historial.append(self.frame_actual)
+            self.frame_actual = {}
+
+    def fases(self):
+        """Nombres de fase en orden de aparición, con 'frame' al final"""
+        nombres = {}
+        for frame in self.historial:
+            for fase in frame:
+                nombres.setdefault(fase, None)
+        nombres.pop('frame', None)
+        return list(nombres) + ['frame']
+
+    def percentiles(self):
+        """{fase: (p50, p95, p99)} sobre los frames guardados (una fase ausente cuenta 0 ms)"""
+        if not self.historial:
+            return {}
+        resultado = {}
+        for fase in self.fases():
+            valores = np.fromiter((frame.get(fase, 0.0) for frame in self.historial), dtype=float)
+            resultado[fase] = tuple(float(v) for v in np.percentile(valores, (50, 95, 99)))
+        return resultado
+
+    def dibujar(self, pantalla):
+        """Overlay con la tabla de percentiles y la gráfica de tiempo por frame; devuelve su rect"""
+        if not self.activo:
+            return None
+        if self._fuente is None:
+            self._fuente = pygame.font.Font(None, 18)
+
+        # La tabla se vuelve a renderizar dos veces por segundo, no en cada frame
+        self._frames_desde_texto += 1
+        if self._texto is None or self._frames_desde_texto >= FPS // 2:
+            self._frames_desde_texto = 0
+            lineas = [f"{'fase':<18}{'p50':>7}{'p95':>7}{'p99':>7}"]
+            for fase, (p50, p95, p99) in self.percentiles().items():
+                lineas.append(f"{fase:<18}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+            alto_linea = self._fuente.get_linesize()
+            self._texto = Surface((230, alto_linea * len(lineas) + 8), SRCALPHA)
+            self._texto.fill((0, 0, 0, 170))
+            for i, linea in enumerate(lineas):
+                self._texto.blit(self._fuente.render(linea, True, BLANCO), (6, 4 + i * alto_linea))
+        rect_texto = pantalla.blit(self._texto, (ANCHO - self._texto.get_width() - 5, 5))
+
+        # Gráfica: una barra por frame, la línea marca el presupuesto de 16.6 ms
+        ancho_grafica, alto_grafica = 240, 60
+        x0 = ANCHO - ancho_grafica - 5
+        y0 = self._texto.get_height() + 10
+        rect_grafica = pygame.draw.rect(pantalla, GRIS_OSCURO, (x0, y0, ancho_grafica, alto_grafica))
+        escala = alto_grafica / (OBJETIVO_FRAME_MS * 2)
+        frames = list(self.historial)[-ancho_grafica:]
+        for i, frame in enumerate(frames):
+            ms = frame.get('frame', 0)
+            alto = min(alto_grafica, int(ms * escala))
+            color = VERDE if ms <= OBJETIVO_FRAME_MS else (AMARILLO if ms <= OBJETIVO_FRAME_MS * 1.5 else ROJO)
+            pygame.draw.line(pantalla, color, (x0 + i, y0 + alto_grafica), (x0 + i, y0 + alto_grafica - alto))
+        y_objetivo = y0 + alto_grafica - int(OBJETIVO_FRAME_MS * escala)
+        pygame.draw.line(pantalla, BLANCO, (x0, y_objetivo), (x0 + ancho_grafica, y_objetivo))
+        # Las líneas incluyen su extremo: sobresalen un píxel del fondo de la gráfica
+        return unir_rects([rect_texto, rect_grafica.inflate(2, 2)])
+
+    def volcar(self, ruta):
+        """Guarda los frames medidos en JSON (con percentiles) o CSV, según la extensión"""
+        fases = self.fases()
+        if ruta.endswith(".csv"):
+            with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+                escritor = csv.writer(archivo)
+                escritor.writerow(['n'] + fases)
+                for n, frame in enumerate(self.historial):
+                    escritor.writerow([n] + [f"{frame.get(fase, 0.0):.4f}" for fase in fases])
+        else:
+            datos = {
+                'percentiles': {fase: dict(zip(('p50', 'p95', 'p99'), valores))
+                                for fase, valores in self.percentiles().items()},
+                'frames': list(self.historial),
+            }
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                json.dump(datos, archivo, indent=1)
+        print(f"Perfil guardado en {ruta}")
+
+perfilador = Perfilador()
+
+# ============= SIMULACIÓN DE LA PARTIDA =============
+class Entradas:
+    """Controles leídos en un frame: lo único que la simulación necesita del teclado y el ratón"""
+    def __init__(self, izquierda=False, derecha=False, arriba=False, abajo=False,
+                 sprint=False, ataque_normal=False, ataque_especial=False, mouse_pos=(0, 0)):
+        self.izquierda = izquierda
+        self.derecha = derecha
+        self.arriba = arriba
+        self.abajo = abajo
+        self.sprint = sprint
+        self.ataque_normal = ataque_normal
+        self.ataque_especial = ataque_especial
+        self.mouse_pos = mouse_pos
+
+    @staticmethod
+    def desde_pygame():
+        """Lee el estado actual del teclado y el ratón"""
+        teclas = pygame.key.get_pressed()
+        botones_mouse = pygame.mouse.get_pressed()
+        return Entradas(
+            izquierda=teclas[pygame.K_LEFT] or teclas[pygame.K_a],
+            derecha=teclas[pygame.K_RIGHT] or teclas[pygame.K_d],
+            arriba=teclas[pygame.K_UP] or teclas[pygame.K_w],
+            abajo=teclas[pygame.K_DOWN] or teclas[pygame.K_s],
+            sprint=teclas[pygame.K_SPACE],
+            ataque_normal=botones_mouse[0],  # Click izquierdo
+            ataque_especial=botones_mouse[2],  # Click derecho
+            mouse_pos=pygame.mouse.get_pos()
+        )
+
+class EstadoPartida:
+    """
+    Todo lo que cambia durante una partida. Cada partida tiene su propio reloj
+    (que solo avanza con la simulación) y su propio generador aleatorio con
+    semilla, así la misma semilla y las mismas entradas dan la misma partida.
+    """
+    def __init__(self, semilla=None):
+        self.semilla = semilla if semilla is not None else random.randrange(2**32)
+        self.reloj = RelojJuego(manual=True)
+        self.rng = random.Random(self.semilla)
+        self.activar()
+        self.jugador = Personaje("oso", 200, 300)
+        self.enemigo = Personaje("puma", 500, 300)
+        self.rocas = [
+            Roca(100, 100),
+            Roca(600, 400),
+            Roca(300, 450)
+        ]
+        self.items_vida = []
+        self.items_energia = []
+        # Los items recogidos o caducados vuelven a su reserva para reutilizarse
+        self.pool_items_vida = PoolObjetos(ItemVida)
+        self.pool_items_energia = PoolObjetos(ItemEnergia)
+        self.ultimo_item_vida = reloj_juego.ahora()
+        self.ultimo_item_energia = reloj_juego.ahora()
+        self.ultimo_ataque_enemigo = reloj_juego.ahora()
+        self.frames = 0
+        self.resultado = None  # None mientras se juega, luego 'victoria' o 'derrota'
+        # Posiciones al inicio del último tick, para interpolar al dibujar
+        self.posiciones_anteriores = {}
+        # Fase amplia de colisiones, reutilizada en cada tick
+        self.rejilla = RejillaEspacial()
+        self.rocas_en_rejilla = []
+        self.proyectiles = SistemaProyectiles()
+
+    def activar(self):
+        """Hace que la lógica del juego use el reloj y el generador de esta partida"""
+        usar_reloj(self.reloj)
+        usar_rng(self.rng)
+
+    def estadisticas_pools(self):
+        """Ocupación y máximos de las reservas de objetos, para ajustar sus tamaños"""
+        return {'proyectiles': self.proyectiles.estadisticas(),
+                'items_vida': self.pool_items_vida.estadisticas(),
+                'items_energia': self.pool_items_energia.estadisticas()}
+
+    def entidades_moviles(self):
+        """Personajes e items: lo que se mueve entre ticks (los proyectiles interpolan aparte)"""
+        yield self.jugador
+        yield self.enemigo
+        yield from self.items_vida
+        yield from self.items_energia
+
+def actualizar_partida(estado, entradas, dt=DT_SIMULACION):
+    """
+    Avanza la partida un tick de `dt` ms (la lógica asume el paso fijo DT_SIMULACION).
+    No dibuja ni lee eventos: todo lo que depende del jugador llega en `entradas`,
+    así se puede simular sin ventana y de forma reproducible.
+    """
+    estado.activar()
+    estado.posiciones_anteriores = {id(e): (e, e.x, e.y) for e in estado.entidades_moviles()}
+    estado.proyectiles.guardar_posiciones()
+    estado.reloj.avanzar(dt)
+    tiempo_actual = estado.reloj.ahora()
+    jugador = estado.jugador
+    enemigo = estado.enemigo
+    rocas = estado.rocas
+    proyectiles = estado.proyectiles
+    estado.frames += 1
+
+    # Movimiento del jugador
+    with perfilador.medir('jugador'):
+        dx = dy = 0
+        if entradas.izquierda:
+            dx = -1
+            jugador.mirando_derecha = False
+        if entradas.derecha:
+            dx = 1
+            jugador.mirando_derecha = True
+        if entradas.arriba:
+            dy = -1
+        if entradas.abajo:
+            dy = 1
+
+        # Sprint
+        sprint_activado = entradas.sprint
+        jugador.actualizar_sprint(sprint_activado)
+
+        # Normalizar movimiento diagonal
+        if dx != 0 and dy != 0:
+            dx *= 0.7071
+            dy *= 0.7071
+
+        # Actualizar posición del jugador
+        nueva_x = jugador.x + dx * jugador.velocidad_actual
+        nueva_y = jugador.y + dy * jugador.velocidad_actual
+
+        # Verificar colisiones con rocas y aplicar empuje suave
+        centro_jugador_x = nueva_x + jugador.ancho/2
+        centro_jugador_y = nueva_y + jugador.alto/2
+        radio_jugador = min(jugador.ancho, jugador.alto) / 2.5
+
+        for roca in rocas:
+            if roca.colisiona_con_circulo(centro_jugador_x, centro_jugador_y, radio_jugador):
+                # Calcular vector de empuje
+                dx_empuje = centro_jugador_x - roca.centro_x
+                dy_empuje = centro_jugador_y - roca.centro_y
+                distancia = max(1, math.sqrt(dx_empuje * dx_empuje + dy_empuje * dy_empuje))
             
-            # Inicializar el juego
-            jugador = Personaje("oso", 200, 300)
-            enemigo = Personaje("puma", 500, 300)
-            rocas = [
-                Roca(100, 100),
-                Roca(600, 400),
-                Roca(300, 450)
-            ]
-            items_vida = []
-            items_energia = []
-            ultimo_item_vida = pygame.time.get_ticks()
-            ultimo_item_energia = pygame.time.get_ticks()
-            ultimo_ataque_enemigo = pygame.time.get_ticks()
-            mensaje = None
+                # Aplicar empuje suave
+                fuerza_empuje = 2.0
+                nueva_x += (dx_empuje / distancia) * fuerza_empuje
+                nueva_y += (dy_empuje / distancia) * fuerza_empuje
 
-            # Bucle principal del juego
-            jugando = True
-            while jugando:
-                tiempo_actual = pygame.time.get_ticks()
-                
-                # Procesar eventos
+        # Aplicar límites de pantalla después del empuje
+        jugador.x = max(0, min(ANCHO - jugador.ancho, nueva_x))
+        jugador.y = max(0, min(ALTO - jugador.alto, nueva_y))
+
+        # Actualizar estado de movimiento para animaciones
+        jugador.moviendo_x = dx != 0
+        jugador.moviendo_y = dy != 0
+    
+        if jugador.moviendo_x or jugador.moviendo_y:
+            jugador.estado_animacion = 'walk'
+        else:
+            jugador.estado_animacion = 'idle'
+
+    # Movimiento del enemigo
+    with perfilador.medir('ia'):
+        enemigo.mover_ia(rocas, jugador)
+
+    # Regeneración de energía
+    if not sprint_activado:
+        jugador.energia = min(jugador.energia_maxima, jugador.energia + 0.2)
+
+    with perfilador.medir('proyectiles'):
+        # Ataques del jugador
+        mouse_pos = entradas.mouse_pos
+        if entradas.ataque_normal:
+            if jugador.atacar_normal():
+                dx = mouse_pos[0] - (jugador.x + jugador.ancho/2)
+                dy = mouse_pos[1] - (jugador.y + jugador.alto/2)
+                direccion = obtener_direccion(dx, dy)
+                proyectiles.disparar(
+                    PROYECTIL_RAYO, DUEÑO_JUGADOR,
+                    jugador.x + jugador.ancho/2,
+                    jugador.y + jugador.alto/2,
+                    direccion
+                )
+                jugador.estado_animacion = 'attack'
+                jugador.frame_actual = 0
+                jugador.tiempo_ultimo_ataque = reloj_juego.ahora()
+
+        if entradas.ataque_especial:
+            if jugador.energia >= 20 and jugador.puede_atacar_especial():
+                sonido_ataque.play()  # Reproducir sonido de ataque
+                dx = mouse_pos[0] - (jugador.x + jugador.ancho/2)
+                dy = mouse_pos[1] - (jugador.y + jugador.alto/2)
+                direccion = obtener_direccion(dx, dy)
+                proyectiles.disparar(
+                    PROYECTIL_RAYO_ESPECIAL, DUEÑO_JUGADOR,
+                    jugador.x + jugador.ancho/2,
+                    jugador.y + jugador.alto/2,
+                    direccion
+                )
+                jugador.energia -= 20
+                jugador.estado_animacion = 'attack'
+
+        # Ataque automático del enemigo
+        if tiempo_actual - estado.ultimo_ataque_enemigo >= DELAY_ATAQUE_ENEMIGO:
+            if enemigo.evolucionado:
+                enemigo.estado_animacion = 'attack'
+                enemigo.frame_actual = 0
+        
+            dx = jugador.x - enemigo.x
+            dy = jugador.y - enemigo.y
+            direccion = obtener_direccion(dx, dy)
+        
+            proyectiles.disparar(
+                PROYECTIL_FUEGO, DUEÑO_ENEMIGO,
+                enemigo.x + enemigo.ancho/2,
+                enemigo.y + enemigo.alto/2,
+                direccion
+            )
+        
+            if rng_juego.random() < (0.25 if enemigo.evolucionado else 0.15):
+                if enemigo.evolucionado:
+                    enemigo.estado_animacion = 'attack'
+                    enemigo.frame_actual = 0
+                proyectiles.disparar(
+                    PROYECTIL_FUEGO_ESPECIAL, DUEÑO_ENEMIGO,
+                    enemigo.x + enemigo.ancho/2,
+                    enemigo.y + enemigo.alto/2
+                )
+        
+            estado.ultimo_ataque_enemigo = tiempo_actual
+
+    # Mover los ataques y descartar los que salen de pantalla o expiran
+    with perfilador.medir('proyectiles'):
+        proyectiles.mover((enemigo, jugador))
+        proyectiles.descartar(tiempo_actual)
+
+    with perfilador.medir('colisiones'):
+        # Con muchas rocas, rocas en la rejilla ensanchadas con el radio de los
+        # proyectiles: a cada proyectil le basta mirar la celda de su centro. Las
+        # rocas no se mueven, así que la rejilla solo se rehace cuando cambian
+        rejilla = None
+        if len(rocas) > UMBRAL_REJILLA_ROCAS:
+            rejilla = estado.rejilla
+            if estado.rocas_en_rejilla != rocas:
+                rejilla.limpiar()
+                for roca in rocas:
+                    rejilla.insertar(roca, roca.centro_x, roca.centro_y, roca.radio + RADIO_PROYECTIL_ROCA)
+                estado.rocas_en_rejilla = list(rocas)
+
+        # Los ataques que chocan con una roca la dañan y desaparecen
+        for indice, roca in proyectiles.impactos_rocas(rocas, rejilla):
+            if roca.recibir_dano(10):
+                rocas.remove(roca)
+            proyectiles.liberar(indice)
+
+        # Ataques del jugador que alcanzan al puma
+        impactados = proyectiles.impactos_personaje(DUEÑO_JUGADOR, enemigo)
+        for indice in impactados:
+            enemigo.recibir_dano()
+            enemigo.vida -= DAÑO_PROYECTIL[proyectiles.tipo[indice]]
+
+            if enemigo.vida <= 0 and not enemigo.evolucionado:
+                enemigo.evolucionar()
+        proyectiles.liberar(impactados)
+
+        # Ataques enemigos que alcanzan al oso
+        impactados = proyectiles.impactos_personaje(DUEÑO_ENEMIGO, jugador)
+        for indice in impactados:
+            if not jugador.invulnerable:
+                jugador.recibir_dano()
+                jugador.vida -= DAÑO_PROYECTIL[proyectiles.tipo[indice]]
+        proyectiles.liberar(impactados)
+
+    with perfilador.medir('items'):
+        # Generar items
+        if tiempo_actual - estado.ultimo_item_vida >= DELAY_ITEM_VIDA:
+            estado.items_vida.append(estado.pool_items_vida.adquirir(
+                rng_juego.randint(50, ANCHO-50),
+                rng_juego.randint(50, ALTO-50)
+            ))
+            estado.ultimo_item_vida = tiempo_actual
+
+        if tiempo_actual - estado.ultimo_item_energia >= DELAY_ITEM_ENERGIA:
+            estado.items_energia.append(estado.pool_items_energia.adquirir(
+                rng_juego.randint(50, ANCHO-50),
+                rng_juego.randint(50, ALTO-50)
+            ))
+            estado.ultimo_item_energia = tiempo_actual
+
+        # Actualizar y verificar colisiones de items
+        for item in estado.items_vida[:]:
+            item.mover()
+            if item.ha_expirado():
+                estado.items_vida.remove(item)
+                estado.pool_items_vida.liberar(item)
+            elif item.colisiona_con_jugador(jugador):
+                # Restaurar 30% de la vida máxima
+                cantidad_curacion = int(jugador.vida_maxima * 0.30)
+                jugador.vida = min(jugador.vida + cantidad_curacion, jugador.vida_maxima)
+                estado.items_vida.remove(item)
+                estado.pool_items_vida.liberar(item)
+
+        for item in estado.items_energia[:]:
+            item.mover()
+            if item.ha_expirado():
+                estado.items_energia.remove(item)
+                estado.pool_items_energia.liberar(item)
+            elif item.colisiona_con_jugador(jugador):
+                jugador.energia = min(jugador.energia + 30, jugador.energia_maxima)
+                estado.items_energia.remove(item)
+                estado.pool_items_energia.liberar(item)
+
+    # Verificar victoria/derrota
+    if enemigo.vida <= 0:
+        estado.resultado = 'victoria'
+    elif jugador.vida <= 0:
+        estado.resultado = 'derrota'
+
+    with perfilador.medir('otros'):
+        # Actualizar ataques normales
+        jugador.actualizar_ataques_normales()
+
+        # Actualizar rocas
+        for roca in rocas[:]:
+            if roca.actualizar():
+                rocas.remove(roca)
+                # Generar nueva roca en posición aleatoria
+                x, y = generar_posicion_roca_aleatoria()
+                rocas.append(Roca(x, y))
+
+        # Invulnerabilidad y animación de los personajes
+        for personaje in (jugador, enemigo):
+            personaje.actualizar_estado(tiempo_actual)
+        actualizar_animaciones((jugador, enemigo), tiempo_actual)
+
+def dibujar_partida(pantalla, estado, alpha=1.0, escena=None):
+    """
+    Dibuja un frame de la partida (sin modificar el estado del juego).
+    `alpha` indica cuánto del siguiente tick ha transcurrido: las entidades se
+    dibujan interpoladas entre su posición anterior y la actual.
+    Con una EscenaPartida se repinta solo lo que ha cambiado; sin ella se
+    dibuja todo directamente. Devuelve los rects dibujados.
+    """
+    interpoladas = []
+    if alpha < 1.0:
+        for entidad in estado.entidades_moviles():
+            anterior = estado.posiciones_anteriores.get(id(entidad))
+            if anterior is not None and anterior[0] is entidad:
+                interpoladas.append((entidad, entidad.x, entidad.y))
+                entidad.x = anterior[1] + (entidad.x - anterior[1]) * alpha
+                entidad.y = anterior[2] + (entidad.y - anterior[2]) * alpha
+    try:
+        if escena is not None:
+            return escena.dibujar(pantalla, estado, alpha)
+        return _dibujar_entidades(pantalla, estado, alpha)
+    finally:
+        for entidad, x, y in interpoladas:
+            entidad.x, entidad.y = x, y
+
+def _dibujar_entidades(pantalla, estado, alpha=1.0):
+    dibujado = []
+    with perfilador.medir('dibujo_fondo'):
+        fondo = fondo_juego()
+        if fondo:
+            pantalla.blit(fondo, (0, 0))
+        else:
+            pantalla.fill(BLANCO)
+
+    with perfilador.medir('dibujo_rocas'):
+        for roca in estado.rocas:
+            dibujado.append(roca.dibujar(pantalla))
+
+    with perfilador.medir('dibujo_items'):
+        for item in estado.items_vida:
+            dibujado.append(item.dibujar(pantalla))
+
+        for item in estado.items_energia:
+            dibujado.append(item.dibujar(pantalla))
+
+    with perfilador.medir('dibujo_ataques'):
+        dibujado += estado.proyectiles.dibujar(pantalla, alpha)
+
+    with perfilador.medir('dibujo_personajes'):
+        dibujado.append(estado.jugador.dibujar(pantalla))
+        dibujado.append(estado.enemigo.dibujar(pantalla))
+
+    with perfilador.medir('dibujo_barras'):
+        dibujado.append(estado.jugador.dibujar_barra_vida(pantalla))
+        dibujado.append(estado.enemigo.dibujar_barra_vida(pantalla))
+        
+        if estado.jugador.ataques_normales_disponibles < estado.jugador.ataques_normales_maximos:
+            dibujado.append(estado.jugador.dibujar_barra_ataques(pantalla))
+    return [rect for rect in dibujado if rect]
+
+class ControladorBot:
+    """Controla al oso sin teclado: se acerca al puma a media distancia y le dispara"""
+    def __init__(self, distancia_preferida=250):
+        self.distancia_preferida = distancia_preferida
+
+    def __call__(self, estado):
+        jugador = estado.jugador
+        enemigo = estado.enemigo
+        dx = enemigo.x - jugador.x
+        dy = enemigo.y - jugador.y
+        distancia = math.hypot(dx, dy)
+        # Acercarse si está lejos, alejarse si está demasiado cerca
+        signo = 1 if distancia > self.distancia_preferida else -1
+        objetivo = (enemigo.x + enemigo.ancho/2, enemigo.y + enemigo.alto/2)
+        return Entradas(
+            izquierda=signo * dx < -5,
+            derecha=signo * dx > 5,
+            arriba=signo * dy < -5,
+            abajo=signo * dy > 5,
+            sprint=estado.proyectiles.cantidad(DUEÑO_ENEMIGO) > 0 and jugador.energia > 40,
+            ataque_normal=True,
+            ataque_especial=jugador.energia >= 60,
+            mouse_pos=objetivo
+        )
+
+def simular_partida(controlador=None, max_frames=FPS * 60 * 5, pantalla=None, semilla=None):
+    """
+    Juega una partida completa sin esperar al reloj real, tan rápido como permita la CPU.
+    `controlador` recibe el estado y devuelve las Entradas del frame (por defecto ControladorBot).
+    Si se pasa `pantalla` también se dibuja cada frame. Devuelve el estado final.
+    """
+    controlador = controlador or ControladorBot()
+    reloj_anterior, rng_anterior = reloj_juego, rng_juego
+    try:
+        estado = EstadoPartida(semilla)
+        while estado.resultado is None and estado.frames < max_frames:
+            actualizar_partida(estado, controlador(estado))
+            if pantalla is not None:
+                dibujar_partida(pantalla, estado)
+    finally:
+        usar_reloj(reloj_anterior)
+        usar_rng(rng_anterior)
+    return estado
+
+# ============= GRABACIÓN Y REPETICIÓN DE PARTIDAS =============
+# Formato .rep: cabecera y, comprimidas con zlib, las entradas por tick agrupadas
+# en rachas iguales seguidas de las huellas periódicas del estado
+MAGIA_REPETICION = b"PRMO"
+VERSION_REPETICION = 1
+INTERVALO_INSTANTANEAS = FPS * 5  # ticks entre instantáneas y huellas
+GUARDAR_REPETICIONES = True
+DIRECTORIO_REPETICIONES = "replays"
+_CABECERA_REPETICION = struct.Struct("<4sBIH")  # magia, versión, semilla, intervalo
+_RACHA_REPETICION = struct.Struct("<HBhh")  # repeticiones, botones, mouse x, mouse y
+_CAMPOS_BOTONES = ('izquierda', 'derecha', 'arriba', 'abajo', 'sprint', 'ataque_normal', 'ataque_especial')
+
+def _codificar_entradas(entradas):
+    """Reduce unas Entradas a (botones, mouse x, mouse y) en enteros"""
+    botones = 0
+    for bit, campo in enumerate(_CAMPOS_BOTONES):
+        if getattr(entradas, campo):
+            botones |= 1 << bit
+    return botones, int(entradas.mouse_pos[0]), int(entradas.mouse_pos[1])
+
+def _decodificar_entradas(botones, mouse_x, mouse_y):
+    return Entradas(mouse_pos=(mouse_x, mouse_y),
+                    **{campo: bool(botones & (1 << bit)) for bit, campo in enumerate(_CAMPOS_BOTONES)})
+
+def huella_estado(estado):
+    """Suma de control de lo esencial de la partida, para detectar desincronizaciones"""
+    jugador, enemigo = estado.jugador, estado.enemigo
+    datos = repr((
+        estado.frames, estado.reloj.ahora(),
+        jugador.x, jugador.y, jugador.vida, jugador.energia,
+        enemigo.x, enemigo.y, enemigo.vida, enemigo.energia,
+        estado.proyectiles.posiciones(DUEÑO_JUGADOR), estado.proyectiles.posiciones(DUEÑO_ENEMIGO),
+        [(r.x, r.y, r.vida) for r in estado.rocas],
+        [(i.x, i.y) for i in estado.items_vida], [(i.x, i.y) for i in estado.items_energia],
+    ))
+    return zlib.crc32(datos.encode())
+
+class GrabadorPartida:
+    """Registra las entradas de cada tick de una partida"""
+    def __init__(self, semilla):
+        self.semilla = semilla
+        self.ticks = []
+        self.huellas = []
+
+    def registrar(self, entradas):
+        """
+        Guarda las entradas del tick y devuelve la versión que hay que simular:
+        la posición del ratón se redondea a enteros igual que al reproducir.
+        """
+        codigo = _codificar_entradas(entradas)
+        self.ticks.append(codigo)
+        return _decodificar_entradas(*codigo)
+
+    def registrar_tick(self, estado):
+        """Llamar tras cada tick simulado: guarda una huella cada INTERVALO_INSTANTANEAS"""
+        if estado.frames % INTERVALO_INSTANTANEAS == 0:
+            self.huellas.append(huella_estado(estado))
+
+    def a_bytes(self):
+        rachas = []
+        for codigo in self.ticks:
+            if rachas and rachas[-1][1] == codigo and rachas[-1][0] < 0xFFFF:
+                rachas[-1][0] += 1
+            else:
+                rachas.append([1, codigo])
+        partes = [struct.pack("<I", len(rachas))]
+        partes.extend(_RACHA_REPETICION.pack(n, *codigo) for n, codigo in rachas)
+        partes.append(struct.pack("<I", len(self.huellas)))
+        partes.append(struct.pack(f"<{len(self.huellas)}I", *self.huellas))
+        cabecera = _CABECERA_REPETICION.pack(MAGIA_REPETICION, VERSION_REPETICION,
+                                             self.semilla, INTERVALO_INSTANTANEAS)
+        return cabecera + zlib.compress(b"".join(partes), 9)
+
+    def guardar(self, ruta):
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with open(ruta, "wb") as archivo:
+            archivo.write(self.a_bytes())
+
+class _PicklerInstantanea(pickle.Pickler):
+    """Las superficies no se copian: se guardan como referencias a las originales"""
+    def __init__(self, archivo, superficies):
+        super().__init__(archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        self.superficies = superficies
+        self.indices = {}
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Surface):
+            indice = self.indices.get(id(obj))
+            if indice is None:
+                indice = self.indices[id(obj)] = len(self.superficies)
+                self.superficies.append(obj)
+            return indice
+        return None
+
+class _UnpicklerInstantanea(pickle.Unpickler):
+    def __init__(self, archivo, superficies):
+        super().__init__(archivo)
+        self.superficies = superficies
+
+    def persistent_load(self, indice):
+        return self.superficies[indice]
+
+def crear_instantanea(estado):
+    """Copia completa del estado de la partida (reloj y generador aleatorio incluidos)"""
+    buffer = io.BytesIO()
+    superficies = []
+    _PicklerInstantanea(buffer, superficies).dump(estado)
+    return buffer.getvalue(), superficies
+
+def restaurar_instantanea(instantanea):
+    datos, superficies = instantanea
+    estado = _UnpicklerInstantanea(io.BytesIO(datos), superficies).load()
+    estado.activar()
+    return estado
+
+class ReproductorPartida:
+    """
+    Vuelve a simular una partida grabada, tick a tick y de forma exacta.
+    Guarda instantáneas cada INTERVALO_INSTANTANEAS ticks, de modo que saltar
+    a un tick ya visitado parte de la instantánea más cercana y no del tick 0.
+    """
+    def __init__(self, datos):
+        magia, version, self.semilla, self.intervalo = _CABECERA_REPETICION.unpack_from(datos, 0)
+        if magia != MAGIA_REPETICION or version != VERSION_REPETICION:
+            raise ValueError("El archivo no es una repetición válida")
+        datos = zlib.decompress(datos[_CABECERA_REPETICION.size:])
+        (num_rachas,) = struct.unpack_from("<I", datos, 0)
+        desplazamiento = 4
+        self.entradas = []
+        for _ in range(num_rachas):
+            n, *codigo = _RACHA_REPETICION.unpack_from(datos, desplazamiento)
+            desplazamiento += _RACHA_REPETICION.size
+            self.entradas.extend([_decodificar_entradas(*codigo)] * n)
+        (num_huellas,) = struct.unpack_from("<I", datos, desplazamiento)
+        desplazamiento += 4
+        self.huellas = list(struct.unpack_from(f"<{num_huellas}I", datos, desplazamiento))
+        self.desincronizado_en = None  # tick en el que falló la primera huella
+        self.instantaneas = {}
+        self.estado = None
+        self.reiniciar()
+
+    @staticmethod
+    def cargar(ruta):
+        with open(ruta, "rb") as archivo:
+            return ReproductorPartida(archivo.read())
+
+    @property
+    def tick(self):
+        return self.estado.frames
+
+    @property
+    def total_ticks(self):
+        return len(self.entradas)
+
+    @property
+    def terminado(self):
+        return self.tick >= self.total_ticks
+
+    def reiniciar(self):
+        self.estado = EstadoPartida(self.semilla)
+        self.instantaneas[0] = crear_instantanea(self.estado)
+
+    def avanzar(self, ticks=1):
+        """Simula los siguientes ticks grabados; devuelve False al llegar al final"""
+        for _ in range(ticks):
+            if self.terminado:
+                return False
+            actualizar_partida(self.estado, self.entradas[self.tick])
+            tick = self.tick
+            if tick % self.intervalo == 0:
+                if tick not in self.instantaneas:
+                    self.instantaneas[tick] = crear_instantanea(self.estado)
+                indice = tick // self.intervalo - 1
+                if (self.desincronizado_en is None and indice < len(self.huellas)
+                        and huella_estado(self.estado) != self.huellas[indice]):
+                    self.desincronizado_en = tick
+                    print(f"⚠️ Repetición desincronizada en el tick {tick}")
+        return not self.terminado
+
+    def buscar(self, tick):
+        """Salta al tick indicado partiendo de la instantánea anterior más cercana"""
+        tick = max(0, min(tick, self.total_ticks))
+        base = max(t for t in self.instantaneas if t <= tick)
+        if tick < self.tick or base > self.tick:
+            self.estado = restaurar_instantanea(self.instantaneas[base])
+        self.avanzar(tick - self.tick)
+
+    def reproducir(self, pantalla=None, velocidad=1.0):
+        """
+        Reproduce hasta el final. Sin pantalla simula lo más rápido posible;
+        con pantalla dibuja a `velocidad` veces el tiempo real
+        (ESC sale, flechas izquierda/derecha saltan 5 segundos).
+        """
+        reloj_anterior, rng_anterior = reloj_juego, rng_juego
+        try:
+            if pantalla is None:
+                while self.avanzar(self.intervalo):
+                    pass
+                return self.estado
+
+            acumulador = 0
+            reloj.tick()
+            escena = EscenaPartida()
+            while not self.terminado:
                 for evento in pygame.event.get():
                     if evento.type == pygame.QUIT:
-                        return "salir"
+                        return self.estado
                     if evento.type == pygame.KEYDOWN:
                         if evento.key == pygame.K_ESCAPE:
-                            jugando = False
-                        elif evento.key == pygame.K_q:  # Añadida la tecla Q
-                            return "salir"  # Salir completamente del juego
-                
-                # Actualizar estado del juego
-                teclas = pygame.key.get_pressed()
-                mouse_pos = pygame.mouse.get_pos()
-                botones_mouse = pygame.mouse.get_pressed()
-                
-                # Movimiento del jugador
-                dx = dy = 0
-                if teclas[pygame.K_LEFT] or teclas[pygame.K_a]:
-                    dx = -1
-                    jugador.mirando_derecha = False
-                if teclas[pygame.K_RIGHT] or teclas[pygame.K_d]:
-                    dx = 1
-                    jugador.mirando_derecha = True
-                if teclas[pygame.K_UP] or teclas[pygame.K_w]:
-                    dy = -1
-                if teclas[pygame.K_DOWN] or teclas[pygame.K_s]:
-                    dy = 1
-
-                # Sprint
-                sprint_activado = teclas[pygame.K_SPACE]
-                jugador.actualizar_sprint(sprint_activado)
-
-                # Normalizar movimiento diagonal
-                if dx != 0 and dy != 0:
-                    dx *= 0.7071
-                    dy *= 0.7071
-
-                # Actualizar posición del jugador
-                nueva_x = jugador.x + dx * jugador.velocidad_actual
-                nueva_y = jugador.y + dy * jugador.velocidad_actual
-
-                # Verificar colisiones con rocas y aplicar empuje suave
-                centro_jugador_x = nueva_x + jugador.ancho/2
-                centro_jugador_y = nueva_y + jugador.alto/2
-                radio_jugador = min(jugador.ancho, jugador.alto) / 2.5
+                            return self.estado
+                        elif evento.key == pygame.K_RIGHT:
+                            self.buscar(self.tick + FPS * 5)
+                        elif evento.key == pygame.K_LEFT:
+                            self.buscar(self.tick - FPS * 5)
+
+                acumulador += reloj.tick(FPS) * velocidad
+                ticks = int(acumulador // DT_SIMULACION)
+                acumulador -= ticks * DT_SIMULACION
+                self.avanzar(ticks)
+                dibujar_partida(pantalla, self.estado, escena=escena)
+                escena.presentar()
+            return self.estado
+        finally:
+            usar_reloj(reloj_anterior)
+            usar_rng(rng_anterior)
+
+def guardar_repeticion(grabador):
+    """Guarda la repetición de la partida en DIRECTORIO_REPETICIONES (si está activado)"""
+    if not GUARDAR_REPETICIONES:
+        return
+    nombre = f"partida_{time.strftime('%Y%m%d_%H%M%S')}_{grabador.semilla}.rep"
+    try:
+        grabador.guardar(os.path.join(DIRECTORIO_REPETICIONES, nombre))
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar la repetición: {e}")
+
+# ============= PANTALLAS DE FIN DE PARTIDA =============
+# Degradado vertical de respaldo: por canal (valor inicial, divisor de y, tope)
+DEGRADADO_VICTORIA = ((100, 2, 255), (80, 3, 255), (20, 6, 100))
+DEGRADADO_DERROTA = ((20, 5, 110), (15, 12, 45), (25, 8, 70))
+
+# Imagen de fondo, degradado de respaldo, título y color del título
+PANTALLAS_FINALES = {
+    'victoria': ("images/fondo_ganar.png", DEGRADADO_VICTORIA, "¡GANASTE!", DORADO_CLARO),
+    'derrota': ("images/fondo_perder.png", DEGRADADO_DERROTA, "HAS PERDIDO", CREMA),
+}
+
+cache_pantallas: Dict[str, Surface] = {}
+
+class GestorPantallas:
+    """
+    Fondos de las pantallas de fin de partida. Cada uno se carga (o se genera
+    como degradado si falta la imagen) una sola vez y queda en cache_pantallas.
+    """
+    @staticmethod
+    def degradado(canales, tamaño=(ANCHO, ALTO)) -> Surface:
+        """Degradado vertical calculado de una vez con NumPy"""
+        ancho, alto = tamaño
+        y = np.arange(alto)
+        columna = np.stack([np.minimum(tope, inicial + y // divisor)
+                            for inicial, divisor, tope in canales], axis=-1)
+        pixeles = np.broadcast_to(columna, (ancho, alto, 3))
+        superficie = Surface(tamaño)
+        pygame.surfarray.blit_array(superficie, pixeles)
+        return superficie
 
-                for roca in rocas:
-                    if roca.colisiona_con_circulo(centro_jugador_x, centro_jugador_y, radio_jugador):
-                        # Calcular vector de empuje
-                        dx_empuje = centro_jugador_x - roca.centro_x
-                        dy_empuje = centro_jugador_y - roca.centro_y
-                        distancia = max(1, math.sqrt(dx_empuje * dx_empuje + dy_empuje * dy_empuje))
-                        
-                        # Aplicar empuje suave
-                        fuerza_empuje = 2.0
-                        nueva_x += (dx_empuje / distancia) * fuerza_empuje
-                        nueva_y += (dy_empuje / distancia) * fuerza_empuje
-
-                # Aplicar límites de pantalla después del empuje
-                jugador.x = max(0, min(ANCHO - jugador.ancho, nueva_x))
-                jugador.y = max(0, min(ALTO - jugador.alto, nueva_y))
-
-                # Actualizar estado de movimiento para animaciones
-                jugador.moviendo_x = dx != 0
-                jugador.moviendo_y = dy != 0
-                
-                if jugador.moviendo_x or jugador.moviendo_y:
-                    jugador.estado_animacion = 'walk'
-                else:
-                    jugador.estado_animacion = 'idle'
-
-                # Movimiento del enemigo
-                enemigo.mover_ia(rocas, jugador)
-
-                # Regeneración de energía
-                if not sprint_activado:
-                    jugador.energia = min(jugador.energia_maxima, jugador.energia + 0.2)
-
-                # Ataques del jugador
-                if botones_mouse[0]:  # Click izquierdo
-                    if jugador.atacar_normal():
-                        dx = mouse_pos[0] - (jugador.x + jugador.ancho/2)
-                        dy = mouse_pos[1] - (jugador.y + jugador.alto/2)
-                        direccion = obtener_direccion(dx, dy)
-                        jugador.ataques.append(AtaqueRayo(
-                            jugador.x + jugador.ancho/2,
-                            jugador.y + jugador.alto/2,
-                            direccion
-                        ))
-                        jugador.estado_animacion = 'attack'
-                        jugador.frame_actual = 0
-                        jugador.tiempo_ultimo_ataque = pygame.time.get_ticks()
-
-                if botones_mouse[2]:  # Click derecho
-                    if jugador.energia >= 20 and jugador.puede_atacar_especial():
-                        sonido_ataque.play()  # Reproducir sonido de ataque
-                        dx = mouse_pos[0] - (jugador.x + jugador.ancho/2)
-                        dy = mouse_pos[1] - (jugador.y + jugador.alto/2)
-                        direccion = obtener_direccion(dx, dy)
-                        jugador.ataques.append(AtaqueRayo(
-                            jugador.x + jugador.ancho/2,
-                            jugador.y + jugador.alto/2,
-                            direccion,
-                            True
-                        ))
-                        jugador.energia -= 20
-                        jugador.estado_animacion = 'attack'
-
-                # Ataque automático del enemigo
-                if tiempo_actual - ultimo_ataque_enemigo >= DELAY_ATAQUE_ENEMIGO:
-                    if enemigo.evolucionado:
-                        enemigo.estado_animacion = 'attack'
-                        enemigo.frame_actual = 0
-                    
-                    dx = jugador.x - enemigo.x
-                    dy = jugador.y - enemigo.y
-                    direccion = obtener_direccion(dx, dy)
-                    
-                    enemigo.ataques.append(AtaqueFuego(
-                        enemigo.x + enemigo.ancho/2,
-                        enemigo.y + enemigo.alto/2,
-                        direccion
-                    ))
-                    
-                    if random.random() < (0.25 if enemigo.evolucionado else 0.15):
-                        if enemigo.evolucionado:
-                            enemigo.estado_animacion = 'attack'
-                            enemigo.frame_actual = 0
-                        enemigo.ataques.append(AtaqueEspecial(
-                            enemigo.x + enemigo.ancho/2,
-                            enemigo.y + enemigo.alto/2,
-                            jugador
-                        ))
-                    
-                    ultimo_ataque_enemigo = tiempo_actual
-
-                # Mover y verificar colisiones de ataques
-                for ataque in jugador.ataques[:]:
-                    ataque.mover()
-                    if isinstance(ataque, AtaqueRayo):
-                        if ataque.x < 0 or ataque.x > ANCHO or ataque.y < 0 or ataque.y > ALTO:
-                            jugador.ataques.remove(ataque)
-                            continue
-                        
-                        for roca in rocas[:]:
-                            if roca.colisiona_con_circulo(ataque.x, ataque.y, 15):
-                                if roca.recibir_dano(10):
-                                    rocas.remove(roca)
-                                if ataque in jugador.ataques:
-                                    jugador.ataques.remove(ataque)
-                                break
-                        
-                        if ataque in jugador.ataques and detectar_colision_circular(
-                            ataque.x, ataque.y, 15,
-                            enemigo.x + enemigo.ancho/2,
-                            enemigo.y + enemigo.alto/2,
-                            min(enemigo.ancho, enemigo.alto) / 2.5
-                        ):
-                            enemigo.recibir_dano()
-                            enemigo.vida -= 20 if isinstance(ataque, AtaqueRayo) and ataque.es_especial else 10
-                            jugador.ataques.remove(ataque)
-                            
-                            if enemigo.vida <= 0 and not enemigo.evolucionado:
-                                enemigo.evolucionar()
-
-                # Mover y verificar colisiones de ataques enemigos
-                for ataque in enemigo.ataques[:]:
-                    ataque.mover()
-                    if isinstance(ataque, AtaqueFuego):
-                        if ataque.x < 0 or ataque.x > ANCHO or ataque.y < 0 or ataque.y > ALTO:
-                            enemigo.ataques.remove(ataque)
-                            continue
-                    elif isinstance(ataque, AtaqueEspecial):
-                        if ataque.ha_expirado():
-                            enemigo.ataques.remove(ataque)
-                            continue
-                    
-                    for roca in rocas[:]:
-                        if roca.colisiona_con_circulo(
-                            ataque.x + 15, ataque.y + 15, 15,
-                            roca.centro_x, roca.centro_y, roca.radio
-                        ):
-                            if roca.recibir_dano(10):
-                                rocas.remove(roca)
-                            if ataque in enemigo.ataques:
-                                enemigo.ataques.remove(ataque)
-                            break
-                    
-                    if ataque in enemigo.ataques:
-                        if (isinstance(ataque, AtaqueFuego) and detectar_colision_circular(
-                            ataque.x + 10, ataque.y + 10, 10,
-                            jugador.x + jugador.ancho/2,
-                            jugador.y + jugador.alto/2,
-                            min(jugador.ancho, jugador.alto) / 2.5
-                        )) or (isinstance(ataque, AtaqueEspecial) and ataque.colisiona_con_jugador(jugador)):
-                            if not jugador.invulnerable:
-                                jugador.recibir_dano()
-                                jugador.vida -= 15 if isinstance(ataque, AtaqueEspecial) else 10
-                            enemigo.ataques.remove(ataque)
-
-                # Generar items
-                if tiempo_actual - ultimo_item_vida >= DELAY_ITEM_VIDA:
-                    items_vida.append(ItemVida(
-                        random.randint(50, ANCHO-50),
-                        random.randint(50, ALTO-50)
-                    ))
-                    ultimo_item_vida = tiempo_actual
-
-                if tiempo_actual - ultimo_item_energia >= DELAY_ITEM_ENERGIA:
-                    items_energia.append(ItemEnergia(
-                        random.randint(50, ANCHO-50),
-                        random.randint(50, ALTO-50)
-                    ))
-                    ultimo_item_energia = tiempo_actual
-
-                # Actualizar y verificar colisiones de items
-                for item in items_vida[:]:
-                    item.mover()
-                    if item.ha_expirado():
-                        items_vida.remove(item)
-                    elif item.colisiona_con_jugador(jugador):
-                        # Restaurar 30% de la vida máxima
-                        cantidad_curacion = int(jugador.vida_maxima * 0.30)
-                        jugador.vida = min(jugador.vida + cantidad_curacion, jugador.vida_maxima)
-                        items_vida.remove(item)
-
-                for item in items_energia[:]:
-                    item.mover()
-                    if item.ha_expirado():
-                        items_energia.remove(item)
-                    elif item.colisiona_con_jugador(jugador):
-                        jugador.energia = min(jugador.energia + 30, jugador.energia_maxima)
-                        items_energia.remove(item)
-
-                # Verificar victoria/derrota
-                if enemigo.vida <= 0:
-                    try:
-                        fondo_victoria = pygame.image.load("images/fondo_ganar.png")
-                        fondo_victoria = pygame.transform.scale(fondo_victoria, (ANCHO, ALTO))
-                    except:
-                        print("⚠️ No se pudo cargar fondo_ganar.png")
-                        fondo_victoria = None
-
-                    # Bucle de la pantalla de victoria
-                    while True:
-                        for evento in pygame.event.get():
-                            if evento.type == pygame.QUIT:
-                                return "salir"
-                            if evento.type == pygame.KEYDOWN:
-                                if evento.key == pygame.K_ESCAPE:
-                                    jugando = False
-                                    break
-
-                        # Dibujar fondo de victoria
-                        if fondo_victoria:
-                            pantalla.blit(fondo_victoria, (0, 0))
-                        else:
-                            # Crear un gradiente dorado si no hay imagen
-                            for y in range(ALTO):
-                                color = (
-                                    min(255, 100 + y//2),
-                                    min(255, 80 + y//3),
-                                    min(100, 20 + y//6)
-                                )
-                                pygame.draw.line(pantalla, color, (0, y), (ANCHO, y))
-
-                        # Renderizar texto "¡GANASTE!"
-                        texto_victoria = FUENTE_TITULO.render("¡GANASTE!", True, DORADO_CLARO)
-                        sombra_victoria = FUENTE_TITULO.render("¡GANASTE!", True, MARRON_OSCURO)
-                        
-                        # Posicionar el texto en la parte superior
-                        rect_texto = texto_victoria.get_rect(center=(ANCHO//2, 120))
-                        
-                        # Dibujar sombra y texto
-                        pantalla.blit(sombra_victoria, (rect_texto.x + 4, rect_texto.y + 4))
-                        pantalla.blit(texto_victoria, rect_texto)
-
-                        # Mensaje para volver al menú
-                        texto_volver = FUENTE_NORMAL.render("Presiona ESC para volver al menú principal", True, BLANCO)
-                        rect_volver = texto_volver.get_rect(center=(ANCHO//2, ALTO - 50))
-                        pantalla.blit(texto_volver, rect_volver)
-
-                        pygame.display.flip()
-                        reloj.tick(60)
-
-                    jugando = False
-                elif jugador.vida <= 0:
-                    mensaje = "Has sido derrotado"
-                    jugando = False
-
-                # Actualizar ataques normales
-                jugador.actualizar_ataques_normales()
-
-                # Actualizar rocas (añadir esto antes del bloque de dibujo)
-                for roca in rocas[:]:
-                    if roca.actualizar():
-                        rocas.remove(roca)
-                        # Generar nueva roca en posición aleatoria
-                        x, y = generar_posicion_roca_aleatoria()
-                        rocas.append(Roca(x, y))
-
-                # Dibujar todo
-                if fondo:
-                    pantalla.blit(fondo, (0, 0))
-                else:
-                    pantalla.fill(BLANCO)
+    @staticmethod
+    def fondo(nombre: str) -> Surface:
+        """Fondo de la pantalla final 'victoria' o 'derrota'"""
+        superficie = cache_pantallas.get(nombre)
+        if superficie is None:
+            ruta, canales, _, _ = PANTALLAS_FINALES[nombre]
+            superficie = GestorImagenes.cargar_imagen(ruta, (ANCHO, ALTO), alpha=False, fallback=lambda: None)
+            if superficie is None:
+                superficie = GestorPantallas.degradado(canales)
+            cache_pantallas[nombre] = superficie
+        return superficie
 
-                for roca in rocas:
-                    roca.dibujar(pantalla)
+    @staticmethod
+    def precargar():
+        """Deja listos los fondos de todas las pantallas finales"""
+        for nombre in PANTALLAS_FINALES:
+            GestorPantallas.fondo(nombre)
 
-                for item in items_vida:
-                    item.dibujar(pantalla)
+async def mostrar_pantalla_final(pantalla, nombre):
+    """Pantalla de victoria o derrota. Devuelve "salir" si se cierra la ventana"""
+    _, _, titulo, color_titulo = PANTALLAS_FINALES[nombre]
+    fondo_final = GestorPantallas.fondo(nombre)
+    renderizador.invalidar()
 
-                for item in items_energia:
-                    item.dibujar(pantalla)
+    while True:
+        for evento in pygame.event.get():
+            if evento.type == pygame.QUIT:
+                return "salir"
+            if evento.type == pygame.KEYDOWN:
+                if evento.key == pygame.K_ESCAPE:
+                    return None
+
+        # Dibujar fondo
+        renderizador.restaurar_fondo(pantalla, fondo_final)
+
+        # Renderizar el título
+        texto_titulo = GestorTextos.render(FUENTE_TITULO, titulo, color_titulo)
+        sombra_titulo = GestorTextos.render(FUENTE_TITULO, titulo, MARRON_OSCURO)
+        
+        # Posicionar el texto en la parte superior
+        rect_texto = texto_titulo.get_rect(center=(ANCHO//2, 120))
+        
+        # Dibujar sombra y texto
+        renderizador.marcar(pantalla.blit(sombra_titulo, (rect_texto.x + 4, rect_texto.y + 4)),
+                            pantalla.blit(texto_titulo, rect_texto))
 
-                for ataque in jugador.ataques:
-                    ataque.dibujar(pantalla)
+        # Mensaje para volver al menú
+        texto_volver = GestorTextos.render(FUENTE_NORMAL, "Presiona ESC para volver al menú principal", BLANCO)
+        rect_volver = texto_volver.get_rect(center=(ANCHO//2, ALTO - 50))
+        renderizador.marcar(pantalla.blit(texto_volver, rect_volver))
 
-                for ataque in enemigo.ataques:
-                    ataque.dibujar(pantalla)
+        renderizador.presentar()
+        reloj.tick(60)
+        await asyncio.sleep(0)
+
+async def mostrar_victoria(pantalla):
+    """Pantalla de victoria. Devuelve "salir" si se cierra la ventana"""
+    return await mostrar_pantalla_final(pantalla, 'victoria')
 
-                jugador.dibujar(pantalla)
-                enemigo.dibujar(pantalla)
+async def mostrar_derrota(pantalla):
+    """Pantalla de derrota. Devuelve "salir" si se cierra la ventana"""
+    return await mostrar_pantalla_final(pantalla, 'derrota')
 
-                jugador.dibujar_barra_vida(pantalla)
-                enemigo.dibujar_barra_vida(pantalla)
+async def main():
+    pantalla = init_runtime()
+    # Las imágenes se decodifican en segundo plano mientras se muestra el progreso
+    dibujar_carga(pantalla, 0)
+    cargador = CargadorAssets(GestorImagenes.trabajos_precarga())
+    await cargador.ejecutar_async(lambda c: dibujar_carga(pantalla, c.progreso()))
+    GestorPantallas.precargar()
+    # Tablas de rotación de los proyectiles, para no rotar nada durante la partida
+    _sprites_proyectiles()
+    # Animaciones de los personajes, para que ni las partidas ni la evolución corten hojas
+    GestorAnimaciones.precargar()
+    
+    while True:
+        opcion = await menu_principal(pantalla)
+        if opcion == "jugar":
+            await reproducir_cinematica(pantalla)
+            
+            # Inicializar el juego: la partida usa su propio reloj de paso fijo
+            reloj_real, rng_real = reloj_juego, rng_juego
+            estado = EstadoPartida()
+            grabador = GrabadorPartida(estado.semilla)
+            acumulador = 0
+            reloj.tick()
+            escena = EscenaPartida()
+
+            # Bucle principal del juego
+            jugando = True
+            while jugando:
+                # La espera hasta el siguiente frame queda fuera de la medición
+                tiempo_frame = reloj.tick(FPS)
+                perfilador.empezar_frame()
+                # Procesar eventos
+                with perfilador.medir('entradas'):
+                    for evento in pygame.event.get():
+                        if evento.type == pygame.QUIT:
+                            return "salir"
+                        if evento.type == pygame.KEYDOWN:
+                            if evento.key == pygame.K_ESCAPE:
+                                jugando = False
+                            elif evento.key == pygame.K_q:  # Añadida la tecla Q
+                                return "salir"  # Salir completamente del juego
+                            elif evento.key == pygame.K_F3:  # Mostrar/ocultar el perfilador
+                                perfilador.alternar()
+                            elif evento.key == pygame.K_F4:  # Volcar el perfil a disco
+                                marca = time.strftime('%Y%m%d_%H%M%S')
+                                perfilador.volcar(f"perfil_{marca}.json")
+                                perfilador.volcar(f"perfil_{marca}.csv")
+                    entradas = Entradas.desde_pygame()
                 
-                if jugador.ataques_normales_disponibles < jugador.ataques_normales_maximos:
-                    jugador.dibujar_barra_ataques(pantalla)
+                # Actualizar estado del juego a paso fijo, tantos ticks como tiempo real haya pasado
+                acumulador = min(acumulador + tiempo_frame, DT_SIMULACION * MAX_TICKS_POR_FRAME)
+                while acumulador >= DT_SIMULACION and estado.resultado is None:
+                    actualizar_partida(estado, grabador.registrar(entradas))
+                    grabador.registrar_tick(estado)
+                    acumulador -= DT_SIMULACION
+
+                if estado.resultado == 'victoria':
+                    if await mostrar_victoria(pantalla) == "salir":
+                        return "salir"
+                    break
+                elif estado.resultado == 'derrota':
+                    if await mostrar_derrota(pantalla) == "salir":
+                        return "salir"
+                    break
+
+                # Dibujar todo, interpolando lo que falta hasta el siguiente tick
+                dibujar_partida(pantalla, estado, acumulador / DT_SIMULACION, escena)
+                escena.marcar(perfilador.dibujar(pantalla))
+
+                with perfilador.medir('flip'):
+                    escena.presentar()
+                perfilador.terminar_frame()
+                # Ceder el control una vez por frame (imprescindible en la versión web)
+                await asyncio.sleep(0)
+
+            guardar_repeticion(grabador)
 
-                pygame.display.flip()
-                reloj.tick(60)
+            # Volver al reloj real para los menús y la cinemática
+            usar_reloj(reloj_real)
+            usar_rng(rng_real)
                 
         elif opcion == "salir":
             break
@@ -1705,8 +3454,8 @@ async def main():
 def generar_posicion_roca_aleatoria():
     """Genera una posición aleatoria para una nueva roca"""
     margen = 100  # Margen para evitar que aparezcan muy cerca de los bordes
-    x = random.randint(margen, ANCHO - margen - 80)  # 80 es el ancho de la roca
-    y = random.randint(margen, ALTO - margen - 80)   # 80 es el alto de la roca
+    x = rng_juego.randint(margen, ANCHO - margen - 80)  # 80 es el ancho de la roca
+    y = rng_juego.randint(margen, ALTO - margen - 80)   # 80 es el alto de la roca
     return x, y
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+"""
+Mide cuánto cuestan la actualización y el dibujo de una partida según la
+cantidad de entidades, sin ventana (driver de vídeo dummy).
+
+Uso: python rendimiento.py [--ticks N] [--guardar] [--base archivo.json] [--salida archivo.json]
+
+Cada escena sintética parte de una partida normal con N rocas, M proyectiles
+y K items; tras cada tick (fuera de la medición) se reponen los proyectiles y
+los items que desaparecieron y se cura a los personajes para que la partida
+no termine. Se mide el tiempo por tick de actualizar_partida y de dibujar la
+escena, con el desglose por fases del perfilador.
+
+Cada escena se mide REPETICIONES veces y de cada fase se guarda la mediana
+por tick de cada repetición: su mínimo, su mediana y su dispersión (el ruido
+de esa medida en esta máquina). Las curvas de escalado varían una sola
+cantidad cada vez, dejando las demás en la escena base, y se resumen con la
+pendiente de una recta ajustada a todos sus puntos (µs por entidad).
+
+Con --guardar los resultados pasan a ser la línea base; si no, se comparan
+con ella. Una fase empeora si incluso su mejor repetición supera la mediana
+de la base en más de un TOLERANCIA por uno y en más del ruido medido en
+cualquiera de las dos tandas. El código de salida es 1 si hay alguna regresión.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+import main as juego
+
+RUTA_BASE = "rendimiento_base.json"
+TICKS = 120
+TICKS_CALENTAMIENTO = 10
+REPETICIONES = 7
+TOLERANCIA = 0.25  # una fase empeora si tarda más de un 25 % que en la base...
+MARGEN_RUIDO = 2.0  # ...y más de dos veces la dispersión entre repeticiones
+MINIMO_MS = 0.05   # diferencias menores son ruido del reloj, aunque el porcentaje sea alto
+
+ESCENA_BASE = {'rocas': 3, 'proyectiles': 10, 'items': 2}
+CURVAS = {
+    'rocas': [3, 10, 30, 100, 300],
+    'proyectiles': [0, 10, 100, 1000, 5000],
+    'items': [0, 10, 100, 1000],
+}
+# Fases que se guardan en los resultados (además de las totales)
+FASES = ('actualizar', 'dibujo', 'ia', 'proyectiles', 'colisiones', 'items', 'otros',
+         'dibujo_rocas', 'dibujo_items', 'dibujo_ataques', 'dibujo_personajes')
+
+
+def crear_escena(rocas, proyectiles, items, semilla=0):
+    """Partida con el número de entidades pedido; devuelve el estado y el generador de la escena"""
+    rng = random.Random(semilla)
+    estado = juego.EstadoPartida(semilla)
+    estado.rocas = [juego.Roca(rng.randint(0, juego.ANCHO - 80), rng.randint(0, juego.ALTO - 80))
+                    for _ in range(rocas)]
+    reponer(estado, rng, proyectiles, items)
+    return estado, rng
+
+
+def reponer(estado, rng, proyectiles, items):
+    """Vuelve a llenar la escena hasta las cantidades pedidas y mantiene viva la partida"""
+    for _ in range(proyectiles - estado.proyectiles.cantidad()):
+        estado.proyectiles.disparar(rng.randrange(4), rng.randrange(2),
+                                    rng.uniform(0, juego.ANCHO), rng.uniform(0, juego.ALTO),
+                                    rng.choice(juego.DIRECCIONES))
+    for lista, pool, cantidad in ((estado.items_vida, estado.pool_items_vida, items - items // 2),
+                                  (estado.items_energia, estado.pool_items_energia, items // 2)):
+        for _ in range(cantidad - len(lista)):
+            lista.append(pool.adquirir(rng.randint(50, juego.ANCHO - 50), rng.randint(50, juego.ALTO - 50)))
+    for personaje in (estado.jugador, estado.enemigo):
+        personaje.vida = personaje.vida_maxima
+    estado.resultado = None
+
+
+def _medir_una_vez(pantalla, rocas, proyectiles, items, ticks, semilla):
+    estado, rng = crear_escena(rocas, proyectiles, items, semilla)
+    controlador = juego.ControladorBot()
+    escena = juego.EscenaPartida()
+    perfilador = juego.perfilador
+    perfilador.historial.clear()
+    for tick in range(TICKS_CALENTAMIENTO + ticks):
+        if tick == TICKS_CALENTAMIENTO:
+            perfilador.historial.clear()
+        entradas = controlador(estado)
+        perfilador.empezar_frame()
+        with perfilador.medir('actualizar'):
+            juego.actualizar_partida(estado, entradas)
+        with perfilador.medir('dibujo'):
+            juego.dibujar_partida(pantalla, estado, 1.0, escena)
+        perfilador.terminar_frame()
+        reponer(estado, rng, proyectiles, items)
+
+    resultado = {}
+    for fase in FASES + ('frame',):
+        valores = np.fromiter((frame.get(fase, 0.0) for frame in perfilador.historial), dtype=float)
+        resultado[fase] = {'media': float(valores.mean()),
+                           'p50': float(np.percentile(valores, 50)),
+                           'p95': float(np.percentile(valores, 95))}
+    return resultado
+
+
+def medir_escena(pantalla, rocas, proyectiles, items, ticks=TICKS, semilla=0):
+    """
+    {fase: {'media', 'p95', 'min', 'p50', 'ruido'}} en ms por tick para una
+    escena medida REPETICIONES veces. 'media' y 'p95' son los mejores de todas
+    las repeticiones; 'min' y 'p50' son el mínimo y la mediana de las
+    medianas de cada repetición, y 'ruido' la distancia entre la mayor y la
+    menor de ellas.
+    """
+    medidas = [_medir_una_vez(pantalla, rocas, proyectiles, items, ticks, semilla)
+               for _ in range(REPETICIONES)]
+    resultado = {}
+    for fase in medidas[0]:
+        medianas = np.array([m[fase]['p50'] for m in medidas])
+        resultado[fase] = {'media': min(m[fase]['media'] for m in medidas),
+                           'p95': min(m[fase]['p95'] for m in medidas),
+                           'min': float(medianas.min()),
+                           'p50': float(np.median(medianas)),
+                           'ruido': float(medianas.max() - medianas.min())}
+    return resultado
+
+
+def pendiente(puntos):
+    """µs por entidad: pendiente de la recta ajustada a los (cantidad, ms por frame) de una curva"""
+    cantidades = np.array([float(cantidad) for cantidad in puntos])
+    ms = np.array([medidas['frame']['p50'] for medidas in puntos.values()])
+    return float(np.polyfit(cantidades, ms, 1)[0]) * 1000
+
+
+def ejecutar(ticks=TICKS):
+    """Mide todas las curvas; devuelve {curva: {cantidad: {fase: ...}}}"""
+    pantalla = juego.init_runtime()
+    juego.GestorImagenes.precargar()
+    juego._sprites_proyectiles()
+    if not juego.perfilador.activo:
+        juego.perfilador.alternar()
+
+    resultados = {}
+    for curva, cantidades in CURVAS.items():
+        resultados[curva] = {}
+        print(f"\n{curva:<12}{'actualizar':>12}{'dibujo':>10}{'frame p50':>11}{'ruido':>10}")
+        for cantidad in cantidades:
+            escena = dict(ESCENA_BASE, **{curva: cantidad})
+            medidas = medir_escena(pantalla, ticks=ticks, **escena)
+            resultados[curva][str(cantidad)] = medidas
+            print(f"{cantidad:<12}{medidas['actualizar']['p50']:>10.3f}ms{medidas['dibujo']['p50']:>8.3f}ms"
+                  f"{medidas['frame']['p50']:>9.3f}ms{medidas['frame']['ruido']:>8.3f}ms")
+        print(f"{'pendiente':<12}{pendiente(resultados[curva]):>10.2f} µs/entidad")
+    return resultados
+
+
+def comparar(resultados, base):
+    """
+    Lista de (curva, cantidad, fase, ms base, ms ahora) de las fases cuya
+    mejor repetición supera la mediana de la base en más de TOLERANCIA, de
+    MARGEN_RUIDO veces el ruido de cualquiera de las dos tandas y de MINIMO_MS
+    """
+    regresiones = []
+    for curva, puntos in resultados.items():
+        for cantidad, fases in puntos.items():
+            anteriores = base.get(curva, {}).get(cantidad, {})
+            for fase, medida in fases.items():
+                if fase not in anteriores:
+                    continue
+                antes, ahora = anteriores[fase]['p50'], medida['min']
+                ruido = max(anteriores[fase].get('ruido', 0.0), medida['ruido'])
+                if ahora - antes > max(MINIMO_MS, antes * TOLERANCIA, ruido * MARGEN_RUIDO):
+                    regresiones.append((curva, cantidad, fase, antes, ahora))
+    return regresiones
+
+
+def _opcion(nombre, defecto):
+    if nombre in sys.argv:
+        return sys.argv[sys.argv.index(nombre) + 1]
+    return defecto
+
+
+if __name__ == "__main__":
+    ruta_base = _opcion("--base", RUTA_BASE)
+    inicio = time.perf_counter()
+    resultados = ejecutar(int(_opcion("--ticks", TICKS)))
+    print(f"\nMedido en {time.perf_counter() - inicio:.1f} s")
+
+    datos = {'version': 2, 'ticks': int(_opcion("--ticks", TICKS)), 'escena_base': ESCENA_BASE,
+             'resultados': resultados}
+    salida = _opcion("--salida", None)
+    if salida:
+        with open(salida, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, indent=1)
+        print(f"Resultados guardados en {salida}")
+
+    if "--guardar" in sys.argv:
+        with open(ruta_base, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, indent=1)
+        print(f"Línea base guardada en {ruta_base}")
+        sys.exit(0)
+
+    if not os.path.exists(ruta_base):
+        print(f"No hay línea base ({ruta_base}); usa --guardar para crearla")
+        sys.exit(0)
+    with open(ruta_base, encoding="utf-8") as archivo:
+        regresiones = comparar(resultados, json.load(archivo)['resultados'])
+    for curva, cantidad, fase, antes, ahora in regresiones:
+        print(f"⚠️ {curva}={cantidad} {fase}: {antes:.3f} ms -> {ahora:.3f} ms ({ahora / antes - 1:+.0%})")
+    print("Sin regresiones" if not regresiones else f"{len(regresiones)} regresiones")
+    sys.exit(1 if regresiones else 0)
@@ -0,0 +1,58 @@
+"""
+Reproduce una partida grabada (.rep) de forma exacta.
+
+Uso: python repetir.py archivo.rep [--ver] [--velocidad N] [--tick N]
+
+Sin --ver la partida se vuelve a simular sin ventana lo más rápido posible y
+se comprueban las huellas grabadas para detectar desincronizaciones. Con
+--ver se dibuja a N veces el tiempo real (ESC sale, flechas saltan 5 s).
+--tick salta directamente a ese tick antes de empezar.
+"""
+import os
+import sys
+
+if "--ver" not in sys.argv:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import time
+
+import pygame
+
+import main as juego
+
+
+def _opcion(nombre, defecto):
+    if nombre in sys.argv:
+        return float(sys.argv[sys.argv.index(nombre) + 1])
+    return defecto
+
+
+def repetir(ruta, ver=False, velocidad=1.0, tick=0):
+    reproductor = juego.ReproductorPartida.cargar(ruta)
+    print(f"Semilla {reproductor.semilla}, {reproductor.total_ticks} ticks "
+          f"({reproductor.total_ticks / juego.FPS:.1f} s de juego)")
+    # Sin --ver la ventana es la del driver dummy: solo hace falta para convertir imágenes
+    pantalla = juego.init_runtime()
+    if not ver:
+        pantalla = None
+    inicio = time.perf_counter()
+    if tick:
+        reproductor.buscar(tick)
+    estado = reproductor.reproducir(pantalla, velocidad)
+    duracion = time.perf_counter() - inicio
+
+    print(f"Tick final {reproductor.tick} en {duracion:.2f} s, resultado: {estado.resultado}")
+    if reproductor.desincronizado_en is not None:
+        print(f"DESINCRONIZADA a partir del tick {reproductor.desincronizado_en}")
+        return 1
+    print("Huellas correctas")
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    sys.exit(repetir(sys.argv[1], ver="--ver" in sys.argv,
+                     velocidad=_opcion("--velocidad", 1.0), tick=int(_opcion("--tick", 0))))
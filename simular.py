@@ -0,0 +1,53 @@
+"""
+Simula partidas oso contra puma sin ventana, tan rápido como permita la CPU.
+
+Uso: python simular.py [partidas] [semilla] [--dibujar]
+
+La partida i usa la semilla `semilla + i`, así una tanda se puede repetir
+exactamente.
+
+Con --dibujar cada frame también se renderiza en una superficie fuera de
+pantalla, útil para medir el coste de dibujo sin abrir una ventana.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import sys
+import time
+
+import pygame
+
+import main as juego
+
+
+def ejecutar(partidas, semilla=0, dibujar=False):
+    juego.init_runtime()
+    pantalla = pygame.Surface((juego.ANCHO, juego.ALTO)) if dibujar else None
+    juego.GestorImagenes.precargar()
+
+    resultados = {'victoria': 0, 'derrota': 0, None: 0}
+    frames_totales = 0
+    maximos = {}  # marca más alta de cada reserva de objetos en toda la tanda
+    inicio = time.perf_counter()
+    for i in range(partidas):
+        estado = juego.simular_partida(pantalla=pantalla, semilla=semilla + i)
+        resultados[estado.resultado] += 1
+        frames_totales += estado.frames
+        for nombre, datos in estado.estadisticas_pools().items():
+            maximos[nombre] = max(maximos.get(nombre, 0), datos['maximo_en_uso'])
+    duracion = time.perf_counter() - inicio
+
+    print(f"{partidas} partidas en {duracion:.2f} s "
+          f"({partidas / duracion * 60:.0f} partidas/min, {frames_totales / duracion:.0f} frames/s)")
+    print(f"Victorias del oso: {resultados['victoria']}  "
+          f"Derrotas: {resultados['derrota']}  Sin terminar: {resultados[None]}")
+    print(f"Duración media: {frames_totales / partidas / juego.FPS:.1f} s de juego")
+    print("Máximo en uso a la vez: " + ", ".join(f"{nombre} {maximo}" for nombre, maximo in maximos.items()))
+
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    ejecutar(int(argumentos[0]) if argumentos else 100,
+             int(argumentos[1]) if len(argumentos) > 1 else 0,
+             dibujar="--dibujar" in sys.argv)
@@ -0,0 +1,50 @@
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from main import PoolObjetos
+
+
+class Punto:
+    def __init__(self, x, y):
+        self.reiniciar(x, y)
+
+    def reiniciar(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def test_reutiliza_los_objetos_liberados():
+    pool = PoolObjetos(Punto)
+    punto = pool.adquirir(1, 2)
+    pool.liberar(punto)
+    reutilizado = pool.adquirir(3, 4)
+    assert reutilizado is punto
+    assert (reutilizado.x, reutilizado.y) == (3, 4)
+    assert pool.estadisticas() == {'en_uso': 1, 'libres': 0, 'maximo_en_uso': 1, 'creados': 1}
+
+
+def test_liberar_dos_veces_es_un_error():
+    pool = PoolObjetos(Punto)
+    punto = pool.adquirir(1, 2)
+    pool.liberar(punto)
+    with pytest.raises(ValueError):
+        pool.liberar(punto)
+    # La reserva sigue intacta: el objeto solo se entrega una vez
+    assert pool.adquirir(0, 0) is punto
+    assert pool.adquirir(0, 0) is not punto
+    assert pool.estadisticas()['en_uso'] == 2
+
+
+def test_se_puede_liberar_de_nuevo_tras_readquirir():
+    pool = PoolObjetos(Punto)
+    punto = pool.adquirir(1, 2)
+    pool.liberar(punto)
+    assert pool.adquirir(5, 6) is punto
+    pool.liberar(punto)
+    assert pool.estadisticas()['libres'] == 1